@@ -0,0 +1,117 @@
+"""Compare the model engines on the same training set, by cost and held-out error.
+
+Usage::
+
+    python -m benchmarks.engines
+    python -m benchmarks.engines --engines random_forest hist_gradient_boosting --output engines.json
+    python -m benchmarks.engines --workers 1 2 4
+
+Every engine is fitted on the same split of ``build_training_dataset``. The
+report lists fit time, scoring throughput through ``score_states`` (the
+inference path of the pipeline), the throughput of
+``generate_streaming_predictions`` for each ``--workers`` count (the process
+pool of ``run_recommender.py --workers``), pickled model size and MAE/RMSE on
+the held-out ratings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from src.recommender.constants import FEATURE_COLUMNS
+from src.recommender.datasets import LOCAL_CSV_DIR, build_training_dataset
+from src.recommender.modeling import MODEL_ENGINES, train_model
+from src.recommender.predictor import (
+    STATE_COLUMN,
+    generate_streaming_predictions,
+    score_states,
+)
+
+_POOL_CHUNKS = 8
+
+
+def compare_engines(
+    training: pd.DataFrame,
+    states: List[str],
+    engines: Sequence[str],
+    workers: Sequence[int] = (1, 2),
+    test_size: float = 0.2,
+    seed: int = 42,
+) -> List[Dict]:
+    train, test = train_test_split(training, test_size=test_size, random_state=seed)
+    movies = test[[c for c in FEATURE_COLUMNS if c != STATE_COLUMN]].drop_duplicates()
+    # The streaming path carries the title and IMDb columns through to its output.
+    candidates = movies.assign(
+        filmenome=test["filmenome"], imdbavaliacao=np.nan, imdbnumvotos=np.nan
+    )
+    chunks = np.array_split(np.arange(len(candidates)), _POOL_CHUNKS)
+    results = []
+    for engine in engines:
+        start = time.perf_counter()
+        model = train_model(train, engine)
+        fit_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        score_states(model, movies, states)
+        score_s = time.perf_counter() - start
+        scored_rows = len(movies) * len(states)
+
+        pool_rows_per_s = {}
+        for count in workers:
+            start = time.perf_counter()
+            generate_streaming_predictions(
+                model, (candidates.iloc[rows] for rows in chunks), states, workers=count
+            )
+            pool_rows_per_s[str(count)] = round(scored_rows / (time.perf_counter() - start))
+
+        errors = np.clip(model.predict(test[FEATURE_COLUMNS]), 1.0, 5.0) - test["nota"]
+        record = {
+            "engine": engine,
+            "fit_s": round(fit_s, 3),
+            "predict_rows_per_s": round(scored_rows / score_s),
+            "pool_rows_per_s": pool_rows_per_s,
+            "model_mb": round(len(pickle.dumps(model, pickle.HIGHEST_PROTOCOL)) / 2**20, 2),
+            "mae": round(float(np.abs(errors).mean()), 4),
+            "rmse": round(float(np.sqrt((errors**2).mean())), 4),
+        }
+        results.append(record)
+        print(
+            f"{engine:<24} fit={record['fit_s']:8.2f}s  "
+            f"predict={record['predict_rows_per_s']:>12,} linhas/s  "
+            + "".join(f"workers={w}:{rate:>12,} linhas/s  " for w, rate in pool_rows_per_s.items())
+            + f"tamanho={record['model_mb']:8.2f}MB  "
+            f"MAE={record['mae']:.4f}  RMSE={record['rmse']:.4f}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--engines", nargs="+", default=list(MODEL_ENGINES), choices=list(MODEL_ENGINES))
+    parser.add_argument("--csv-dir", type=Path, default=LOCAL_CSV_DIR)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2])
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    training, states = build_training_dataset(None, csv_dir=args.csv_dir)
+    print(f"{len(training):,} avaliações, {len(states)} estados")
+    results = compare_engines(
+        training, states, args.engines, workers=args.workers, test_size=args.test_size
+    )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Resultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
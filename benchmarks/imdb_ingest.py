@@ -0,0 +1,43 @@
+"""Time the local IMDb ingestion on synthetic ``.tsv.gz`` dumps.
+
+Usage::
+
+    python -m benchmarks.imdb_ingest --titles 1000000 2000000
+
+The real ``title.basics`` dump has roughly 11-12 million titles.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import write_imdb_dumps
+from src.recommender.datasets import prepare_candidate_movies
+from src.recommender.imdb import build_imdb_movies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, nargs="+", default=[1_000_000])
+    args = parser.parse_args()
+
+    for titles in args.titles:
+        with tempfile.TemporaryDirectory(prefix=f"imdb-{titles}-") as workdir:
+            directory = Path(workdir)
+            write_imdb_dumps(titles, directory)
+            start = time.perf_counter()
+            rows = build_imdb_movies(directory, directory / "imdb_movies.parquet")
+            elapsed = time.perf_counter() - start
+            # The output must stay readable by the inference step.
+            prepare_candidate_movies(directory / "imdb_movies.parquet", 400)
+            print(
+                f"titulos={titles:>12,}  candidatos={rows:>10,}  "
+                f"{elapsed:8.2f}s  {titles / elapsed:>12,.0f} titulos/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
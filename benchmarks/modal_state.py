@@ -0,0 +1,64 @@
+"""Compare the vectorized modal-state computation with the per-group callback.
+
+Usage: ``python -m benchmarks.modal_state [--users 10000 100000 1000000]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.recommender.datasets import modal_state
+
+
+def _most_frequent(series: pd.Series) -> str:
+    """Former ``datasets._most_frequent`` callback, kept as the reference."""
+    mode = series.mode()
+    if not mode.empty:
+        return mode.iloc[0]
+    return series.iloc[-1]
+
+
+def _synthetic_receipts(n_users: int, rows_per_user: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    states = np.array([f"Estado {i:02d}" for i in range(50)], dtype=object)
+    n_rows = n_users * rows_per_user
+    return pd.DataFrame(
+        {
+            "usuariosk": rng.integers(1, n_users + 1, size=n_rows),
+            # Few distinct states per user so ties are frequent.
+            "estado": states[rng.integers(0, 4, size=n_rows) * 12],
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--rows-per-user", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for n_users in args.users:
+        receipts = _synthetic_receipts(n_users, args.rows_per_user, args.seed)
+
+        start = time.perf_counter()
+        reference = receipts.groupby("usuariosk")["estado"].agg(_most_frequent).reset_index()
+        callback_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = modal_state(receipts)
+        vectorized_s = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(reference, vectorized)
+        print(
+            f"users={n_users:>9,}  callback={callback_s:8.3f}s  "
+            f"vectorized={vectorized_s:8.3f}s  speedup={callback_s / vectorized_s:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
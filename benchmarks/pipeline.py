@@ -0,0 +1,194 @@
+"""Time and memory-profile each pipeline stage on synthetic data at several scales.
+
+Usage::
+
+    python -m benchmarks.pipeline --scales 10000 100000 --output bench.json
+    python -m benchmarks.pipeline --scales 10000 --compare bench.json
+
+Results are written as JSON (one record per scale and stage) so runs from
+different commits can be diffed with ``--compare``. ``write_table`` targets a
+file-backed SQLite stand-in unless ``--database-url`` points at PostgreSQL.
+Timings come from a pass without tracemalloc; memory peaks from a second,
+traced pass (skip it with ``--no-trace-memory``).
+
+``predict_streaming`` is the path ``run_pipeline`` takes: the whole catalog
+streamed through ``iter_candidate_movies`` into
+``generate_streaming_predictions``, and its output is what ``write_table``
+writes. ``prepare_candidate_movies``/``generate_predictions`` time the former
+fixed ``CANDIDATE_LIMIT`` path and are kept so older results stay comparable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import create_engine, event
+
+from benchmarks.synthetic import Scale, write_dw_csvs, write_imdb_candidates
+from src.recommender.constants import CANDIDATE_CHUNK_SIZE, CANDIDATE_LIMIT
+from src.recommender.database import write_table
+from src.recommender.datasets import (
+    build_training_dataset,
+    iter_candidate_movies,
+    prepare_candidate_movies,
+)
+from src.recommender.metrics import RunMetrics
+from src.recommender.modeling import train_model
+from src.recommender.predictor import generate_predictions, generate_streaming_predictions
+
+DEFAULT_SCALES = [10_000, 100_000]
+
+
+def _sqlite_engine(directory: Path):
+    engine = create_engine(f"sqlite:///{directory / 'main.db'}")
+    target = directory / "imdb_alv.db"
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_connection, _record):
+        dbapi_connection.execute(f"ATTACH DATABASE '{target}' AS imdb_alv")
+
+    return engine
+
+
+def _run_stages(
+    scale: Scale, workdir: Path, database_url: str | None, metrics: RunMetrics
+) -> None:
+    csv_dir = workdir / "csv"
+    candidates_path = workdir / "imdb_movies.parquet"
+    with metrics.stage("build_training_dataset", rows_in=scale.ratings) as record:
+        training, states = build_training_dataset(None, csv_dir=csv_dir)
+        record.rows_out = len(training)
+    with metrics.stage("train_model", rows_in=len(training)):
+        model = train_model(training)
+    with metrics.stage("prepare_candidate_movies", rows_in=scale.candidates) as record:
+        candidates = prepare_candidate_movies(candidates_path, CANDIDATE_LIMIT)
+        record.rows_out = len(candidates)
+        record.bytes_read = candidates_path.stat().st_size
+    with metrics.stage("generate_predictions", rows_in=len(candidates) * len(states)) as record:
+        record.rows_out = len(generate_predictions(model, candidates, states))
+    with metrics.stage("predict_streaming") as record:
+        record.bytes_read = candidates_path.stat().st_size
+        streamed = 0
+
+        def counted():
+            nonlocal streamed
+            for chunk in iter_candidate_movies(candidates_path, CANDIDATE_CHUNK_SIZE):
+                streamed += len(chunk)
+                yield chunk
+
+        predictions = generate_streaming_predictions(model, counted(), states)
+        record.rows_in = streamed * len(states)
+        record.rows_out = len(predictions)
+
+    engine = create_engine(database_url) if database_url else _sqlite_engine(workdir)
+    with metrics.stage("write_table", rows_in=len(predictions)) as record:
+        record.frame_bytes = int(predictions.memory_usage(deep=True).sum())
+        record.bytes_written = write_table(
+            engine, predictions, schema="imdb_alv", table_name="model_infer_bench"
+        )
+    engine.dispose()
+
+
+def run_scale(
+    ratings: int, workdir: Path, database_url: str | None, trace_memory: bool = True
+) -> List[Dict]:
+    """Benchmark every stage at one scale.
+
+    Wall and CPU times come from a pass without tracemalloc, whose per-allocation
+    hooks slow down Python-heavy stages; with ``trace_memory`` the stages run a
+    second time to record the tracemalloc peaks.
+    """
+    scale = Scale(ratings)
+    write_dw_csvs(scale, workdir / "csv")
+    write_imdb_candidates(scale, workdir / "imdb_movies.parquet")
+
+    timed = RunMetrics()
+    _run_stages(scale, workdir, database_url, timed)
+    records = timed.to_dict()["stages"]
+    if trace_memory:
+        traced = RunMetrics(trace_memory=True)
+        _run_stages(scale, workdir, database_url, traced)
+        for record, memory in zip(records, traced.stages):
+            record["tracemalloc_peak_mb"] = memory.tracemalloc_peak_mb
+
+    for record in records:
+        record["scale"] = ratings
+        peak = record["tracemalloc_peak_mb"]
+        print(
+            f"ratings={ratings:>10,}  {record['stage']:<26} {record['wall_s']:9.3f}s  "
+            f"tracemalloc={'-' if peak is None else f'{peak:.1f}MB':>11}  "
+            f"rss={record['peak_rss_mb']:9.1f}MB"
+        )
+    return records
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _compare(current: List[Dict], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {(r["scale"], r["stage"]): r for r in baseline["results"]}
+    print(f"\nComparação com {baseline_path} ({baseline['commit'][:12]}):")
+    for record in current:
+        old = previous.get((record["scale"], record["stage"]))
+        if old is None or not old["wall_s"]:
+            continue
+        memory = "-"
+        if record["tracemalloc_peak_mb"] is not None and old["tracemalloc_peak_mb"] is not None:
+            ratio = record["tracemalloc_peak_mb"] / max(old["tracemalloc_peak_mb"], 1e-9)
+            memory = f"x{ratio:5.2f}"
+        print(
+            f"ratings={record['scale']:>10,}  {record['stage']:<26} "
+            f"tempo x{record['wall_s'] / old['wall_s']:5.2f}  memória {memory}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    parser.add_argument(
+        "--trace-memory",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Roda as etapas uma segunda vez sob tracemalloc para medir o pico de memória.",
+    )
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    for ratings in args.scales:
+        with tempfile.TemporaryDirectory(prefix=f"bench-{ratings}-") as workdir:
+            results.extend(
+                run_scale(ratings, Path(workdir), args.database_url, args.trace_memory)
+            )
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Resultados gravados em {args.output}")
+    if args.compare:
+        _compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
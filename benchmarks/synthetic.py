@@ -0,0 +1,197 @@
+"""DW-shaped synthetic datasets for benchmarking the recommendation pipeline.
+
+Dimensions (users with their states, movies and genres) come from the
+operational generator in ``generate_DML_populate_tables_ALV.DataBase``; the
+fact tables are then drawn with NumPy so that 10^6-10^7 ratings stay cheap to
+produce.
+"""
+
+from __future__ import annotations
+
+import gzip
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+import faker
+import numpy as np
+import pandas as pd
+
+from generate_DML_populate_tables_ALV import DataBase
+
+IMDB_GENRES = np.array(
+    [
+        "Action", "Adventure", "Animation", "Biography", "Comedy", "Crime",
+        "Documentary", "Drama", "Family", "Fantasy", "History", "Horror",
+        "Music", "Mystery", "Romance", "Sci-Fi", "Sport", "Thriller", "War",
+    ],
+    dtype=object,
+)
+
+
+@dataclass(frozen=True)
+class Scale:
+    """Row counts derived from the number of ratings."""
+
+    ratings: int
+
+    @property
+    def users(self) -> int:
+        return int(np.clip(self.ratings // 10, 100, 50_000))
+
+    @property
+    def movies(self) -> int:
+        return int(np.clip(self.ratings // 40, 50, 20_000))
+
+    @property
+    def receipts(self) -> int:
+        return max(self.users, self.ratings * 3 // 10)
+
+    @property
+    def candidates(self) -> int:
+        return max(1_000, self.ratings // 10)
+
+
+def _dimensions(scale: Scale, seed: int) -> Tuple[List, List, List]:
+    faker.Faker.seed(seed)
+    db = DataBase()
+    usuarios = list(db.iter_rows("Usuario", scale.users))
+    filmes = list(db.iter_rows("Filme", scale.movies))
+    generos = list(db.iter_rows("Filme_Genero", scale.movies // 5))
+    return usuarios, filmes, generos
+
+
+def write_dw_csvs(scale: Scale, directory: Path, seed: int = 42) -> None:
+    """Write avaliacao/filme/receita/endereco CSVs in the ``data/CSVs`` layout."""
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    usuarios, filmes, generos = _dimensions(scale, seed)
+
+    states = sorted({usuario.Estado for usuario in usuarios})
+    endereco = pd.DataFrame({"enderecosk": np.arange(1, len(states) + 1), "estado": states})
+    state_sk = dict(zip(endereco["estado"], endereco["enderecosk"]))
+    user_address = np.array([state_sk[usuario.Estado] for usuario in usuarios])
+
+    genres = {}
+    for row in generos:
+        genres[row.FilmeID] = min(genres.get(row.FilmeID, row.GeneroFilme), row.GeneroFilme)
+    filme = pd.DataFrame(
+        {
+            "filmesk": [f.FilmeID for f in filmes],
+            "duracaomin": [f.DuracaoMin for f in filmes],
+            "filmenome": [f.FilmeNome for f in filmes],
+            "anodelancamento": [int(f.AnoDe_Lancamento) for f in filmes],
+            "generonome": [
+                genres.get(f.FilmeID, "Gênero Desconhecido") for f in filmes
+            ],
+        }
+    )
+
+    raters = rng.integers(1, scale.users + 1, size=scale.ratings)
+    avaliacao = pd.DataFrame(
+        {
+            "avaliacaosk": np.arange(scale.ratings),
+            "nota": rng.integers(1, 6, size=scale.ratings),
+            "usuariosk": raters,
+            "filmesk": rng.integers(1, scale.movies + 1, size=scale.ratings),
+            "produtorask": rng.integers(1, 21, size=scale.ratings),
+            "calendariosk": rng.integers(1, 1096, size=scale.ratings),
+            "enderecosk": user_address[raters - 1],
+        }
+    )
+
+    payers = rng.integers(1, scale.users + 1, size=scale.receipts)
+    # Most payments use the user's own address, some another state, so the
+    # modal-state computation has real work (and ties) to resolve.
+    moved = rng.random(scale.receipts) < 0.2
+    receita_address = np.where(
+        moved, rng.integers(1, len(states) + 1, size=scale.receipts), user_address[payers - 1]
+    )
+    receita = pd.DataFrame(
+        {
+            "receitask": np.arange(scale.receipts),
+            "valorpago": rng.choice([29, 49, 99], size=scale.receipts),
+            "usuariosk": payers,
+            "calendariosk": rng.integers(1, 1096, size=scale.receipts),
+            "enderecosk": receita_address,
+        }
+    )
+
+    avaliacao.to_csv(directory / "avaliacao.csv", index=False)
+    endereco.to_csv(directory / "endereco.csv", index=False)
+    filme.to_csv(directory / "filme.csv", index=False)
+    receita.to_csv(directory / "receita.csv", index=False)
+
+
+def write_imdb_candidates(scale: Scale, path: Path, seed: int = 42) -> None:
+    """Write a parquet with the ``aws/imdb_movies.parquet`` schema."""
+    rng = np.random.default_rng(seed)
+    n = scale.candidates
+    first = IMDB_GENRES[rng.integers(0, len(IMDB_GENRES), size=n)]
+    second = IMDB_GENRES[rng.integers(0, len(IMDB_GENRES), size=n)]
+    genres = np.where(rng.random(n) < 0.5, first, first + "," + second)
+    frame = pd.DataFrame(
+        {
+            "tconst": [f"tt{i:08d}" for i in range(n)],
+            "primarytitle": [f"Title {i}" for i in range(n)],
+            "startyear": rng.integers(1890, 2026, size=n).astype("float64"),
+            "runtimeminutes": rng.integers(0, 240, size=n).astype("float64"),
+            "genres": genres,
+            "averagerating": np.round(rng.uniform(1.0, 10.0, size=n), 1),
+            "numvotes": rng.lognormal(7.0, 1.5, size=n).astype("int64"),
+        }
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    frame.to_parquet(path, index=False)
+
+
+def write_imdb_dumps(titles: int, directory: Path, seed: int = 42) -> None:
+    """Write gzip TSVs shaped like IMDb's ``title.basics`` and ``title.ratings``.
+
+    Includes the quirks of the real dumps: ``\\N`` nulls, non-movie title
+    types, bare quotes in titles, stray text in ``runtimeMinutes``, titles
+    without ratings and one line with too many fields.
+    """
+    rng = np.random.default_rng(seed)
+    tconst = np.array([f"tt{i:08d}" for i in range(titles)], dtype=object)
+    title_type = rng.choice(
+        np.array(["movie", "short", "tvEpisode", "tvSeries"], dtype=object),
+        size=titles,
+        p=[0.3, 0.1, 0.5, 0.1],
+    )
+    first = IMDB_GENRES[rng.integers(0, len(IMDB_GENRES), size=titles)]
+    second = IMDB_GENRES[rng.integers(0, len(IMDB_GENRES), size=titles)]
+    genres = np.where(rng.random(titles) < 0.5, first, first + "," + second)
+    genres[rng.random(titles) < 0.02] = "\\N"
+    runtime = rng.integers(1, 240, size=titles).astype(str).astype(object)
+    runtime[rng.random(titles) < 0.1] = "\\N"
+    runtime[rng.random(titles) < 0.001] = "Reality-TV"
+    basics = pd.DataFrame(
+        {
+            "tconst": tconst,
+            "titleType": title_type,
+            "primaryTitle": [f'Title "{i}"' for i in range(titles)],
+            "originalTitle": [f"Original {i}" for i in range(titles)],
+            "isAdult": "0",
+            "startYear": rng.integers(1890, 2026, size=titles).astype(str),
+            "endYear": "\\N",
+            "runtimeMinutes": runtime,
+            "genres": genres,
+        }
+    )
+    rated = rng.random(titles) < 0.6
+    ratings = pd.DataFrame(
+        {
+            "tconst": tconst[rated],
+            "averageRating": np.round(rng.uniform(1.0, 10.0, size=int(rated.sum())), 1),
+            "numVotes": rng.lognormal(6.5, 1.5, size=int(rated.sum())).astype("int64") + 5,
+        }
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, frame in (("title.basics", basics), ("title.ratings", ratings)):
+        rows = ["\t".join(frame.columns)]
+        rows += ["\t".join(map(str, row)) for row in frame.itertuples(index=False)]
+        if name == "title.basics":
+            rows.append("tt99999999\tmovie\tBroken\trow\twith\ttoo\tmany\tfields\t1\t2")
+        with gzip.open(directory / f"{name}.tsv.gz", "wt", encoding="utf-8") as f:
+            f.write("\n".join(rows) + "\n")
@@ -1,9 +1,17 @@
+import argparse
 import random
-import itertools
+import zlib
+import shutil
+import tempfile
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import date
-from typing import Optional
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
 from abc import ABC, abstractmethod
 import faker
 
@@ -15,22 +23,53 @@ def value_wrapper(value: int | str | date) -> str:
         return f"'{value}'"
     return str(value)
 
+def sample_pairs(rng: random.Random, left: list, right: list, k: int) -> list[tuple]:
+    # Same draw as rng.sample(list(itertools.product(left, right)), k), but the
+    # flattened index space is sampled instead of materializing the product.
+    n_right = len(right)
+    total = len(left) * n_right
+    indices = rng.sample(range(total), k=min(k, total))
+    return [(left[i // n_right], right[i % n_right]) for i in indices]
+
+def copy_wrapper(value: int | str | date | None) -> str:
+    # Text format of PostgreSQL's COPY: tab-separated, \N for NULL.
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
 class TableRow(ABC):
+    # Rows are slotted dataclasses: the slots are the columns, in DDL order.
+    __slots__ = ()
+
+    @classmethod
+    def columns(cls) -> str:
+        return ", ".join(cls.__slots__)
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, column) for column in self.__slots__)
+
     def __str__(self):
-        fields = []
-        values = []
-        for field, value in self.__dict__.items():
-            fields.append(field)
-            values.append(value_wrapper(value))
-        return f"INSERT INTO {self.__class__.__name__} ({', '.join(fields)}) VALUES ({', '.join(values)});"
-
-@dataclass
+        return f"INSERT INTO {self.__class__.__name__} ({self.columns()}) VALUES {self.values_sql()};"
+
+    def values_sql(self) -> str:
+        return f"({', '.join(value_wrapper(value) for value in self.values())})"
+
+    def copy_line(self) -> str:
+        return "\t".join(copy_wrapper(value) for value in self.values())
+
+@dataclass(slots=True)
 class Plano(TableRow):
     PlanoID: int
     PrecoMensal: int
     PlanoNome: str
 
-@dataclass
+@dataclass(slots=True)
 class Assinatura(TableRow):
     AssinaturaID: int
     DataInicio: date
@@ -38,7 +77,7 @@ class Assinatura(TableRow):
     Status: int
     PlanoID: int
 
-@dataclass
+@dataclass(slots=True)
 class Usuario(TableRow):
     UsuarioID: int
     Email: str
@@ -54,14 +93,14 @@ class Usuario(TableRow):
     Estado: str
     Logradouro: str
 
-@dataclass
+@dataclass(slots=True)
 class Filme(TableRow):
     DuracaoMin: int
     FilmeNome: str
     FilmeID: int
     AnoDe_Lancamento: int
 
-@dataclass
+@dataclass(slots=True)
 class Avaliacao(TableRow):
     Comentario: Optional[str]
     AvaliacaoData: date
@@ -70,24 +109,24 @@ class Avaliacao(TableRow):
     UsuarioID: int
     FilmeID: int
 
-@dataclass
+@dataclass(slots=True)
 class Produtora(TableRow):
     ProdutoraID: int
     ProdutoraNome: str
 
-@dataclass
+@dataclass(slots=True)
 class Cargo(TableRow):
     CargoID: int
     CargoNome: str
 
-@dataclass
+@dataclass(slots=True)
 class Funcionario(TableRow):
     FuncionarioID: int
     Salario: float
     FuncionarioNome: str
     CargoID: int
 
-@dataclass
+@dataclass(slots=True)
 class UsrPagto(TableRow):
     UsrPagtoID: int
     ValorPago: float
@@ -95,61 +134,126 @@ class UsrPagto(TableRow):
     UsuarioID: int
     AssinaturaID: int
 
-@dataclass
+@dataclass(slots=True)
 class Assiste(TableRow):
     Data: date
     UsuarioID: int
     FilmeID: int
 
-@dataclass
+@dataclass(slots=True)
 class Modera(TableRow):
     FuncionarioID: int
     AvaliacaoID: int
 
-@dataclass
+@dataclass(slots=True)
 class Gerencia_Conteudo(TableRow):
     FilmeID: int
     FuncionarioID: int
 
-@dataclass
+@dataclass(slots=True)
 class FilmPagtoRoy(TableRow):
     ValorPagto: float
     DataPagto: date
     ProdutoraID: int
     FilmeID: int
 
-@dataclass
+@dataclass(slots=True)
 class Filme_GeneroFilme(TableRow):
     GeneroFilme: str
     FilmeID: int
 
-@dataclass
+@dataclass(slots=True)
 class Filme_DiretorFilme(TableRow):
     DiretorFilme: str
     FilmeID: int
 
-@dataclass
+@dataclass(slots=True)
 class Filme_AtorFilme(TableRow):
     AtorFilme: str
     FilmeID: int
 
 
+def write_insert_section(f, table_name: str, row_class: type, rows: Iterable[TableRow], batch_size: int = 1):
+    # batch_size > 1 groups rows into multi-row INSERT statements.
+    f.write(f"-- Table: {table_name}\n")
+    if batch_size <= 1:
+        for row in rows:
+            f.write(str(row) + "\n")
+    else:
+        rows = iter(rows)
+        while batch := list(islice(rows, batch_size)):
+            f.write(f"INSERT INTO {row_class.__name__} ({row_class.columns()}) VALUES\n")
+            f.write(",\n".join(row.values_sql() for row in batch) + ";\n")
+    f.write("\n")
+
+def write_copy_section(f, table_name: str, row_class: type, rows: Iterable[TableRow]):
+    # One COPY ... FROM stdin block per table; load with psql -f <path>.
+    f.write(f"-- Table: {table_name}\n")
+    f.write(f"COPY {row_class.__name__} ({row_class.columns()}) FROM stdin;\n")
+    for row in rows:
+        f.write(row.copy_line() + "\n")
+    f.write("\\.\n\n")
+
+
 class DataBase:
     START_DATE = date(2023, 1, 1)
     END_DATE = date(2025, 12, 31)
 
-    def __init__(self):
-        self.tables = defaultdict(list)
+    # (table, row class, generator method, row count, tables it reads), in
+    # foreign-key order; the output files list the tables in this order.
+    PLAN = [
+        ("Plano", Plano, "create_table_plano", None, ()),
+        ("Usuario", Usuario, "create_table_usuario", 2000, ()),
+        ("Filme", Filme, "create_table_filme", 500, ()),
+        ("Produtora", Produtora, "create_table_produtora", 20, ()),
+        ("Cargo", Cargo, "create_table_cargo", 15, ()),
+        ("Funcionario", Funcionario, "create_table_funcionario", 1000, ("Cargo",)),
+        ("Assinatura", Assinatura, "create_table_assinatura", 1500, ("Plano",)),
+        ("Avaliacao", Avaliacao, "create_table_avaliacao", 20000, ("Usuario", "Filme")),
+        ("FilmPagtoRoy", FilmPagtoRoy, "create_table_film_pagto_roy", 400, ("Filme", "Produtora")),
+        ("UsrPagto", UsrPagto, "create_table_usr_pagto", 6000, ("Usuario", "Assinatura")),
+        ("Assiste", Assiste, "create_table_assiste", 15000, ("Usuario", "Filme")),
+        ("Modera", Modera, "create_table_modera", 20, ("Funcionario", "Avaliacao")),
+        ("Gerencia_Conteudo", Gerencia_Conteudo, "create_table_gerencia_conteudo", 50, ("Funcionario", "Filme")),
+        ("Filme_Genero", Filme_GeneroFilme, "create_table_filme_genero_filme", 100, ("Filme",)),
+        ("Filme_Diretor", Filme_DiretorFilme, "create_table_filme_diretor_filme", 100, ("Filme",)),
+        ("Filme_Ator", Filme_AtorFilme, "create_table_filme_ator_filme", 100, ("Filme",)),
+    ]
+    # Primary keys other tables sample foreign keys from; only these columns
+    # are kept in memory while the rows themselves are streamed to the output.
+    KEY_COLUMNS = {
+        "Plano": "PlanoID",
+        "Usuario": "UsuarioID",
+        "Filme": "FilmeID",
+        "Produtora": "ProdutoraID",
+        "Cargo": "CargoID",
+        "Funcionario": "FuncionarioID",
+        "Assinatura": "AssinaturaID",
+        "Avaliacao": "AvaliacaoID",
+    }
+
+    def __init__(self, seed: Optional[int] = None):
+        self.keys = defaultdict(lambda: array("q"))
+        self.seed = seed
+
+    def faker(self, table_name: str) -> faker.Faker:
+        # Without a seed every table shares Faker's global random generator;
+        # with one, each table draws from its own stream, so the output does not
+        # depend on the order (or the process) in which tables are generated.
+        fake = faker.Faker()
+        if self.seed is not None:
+            fake.seed_instance(zlib.crc32(f"{self.seed}:{table_name}".encode()))
+        return fake
 
     def create_table_plano(self):
-        self.tables["Plano"].append(Plano(1, 29, "Básico"))
-        self.tables["Plano"].append(Plano(2, 49, "Padrão"))
-        self.tables["Plano"].append(Plano(3, 99, "Premium"))
+        yield Plano(1, 29, "Básico")
+        yield Plano(2, 49, "Padrão")
+        yield Plano(3, 99, "Premium")
 
     def create_table_usuario(self, n: int):
-        fake = faker.Faker()
+        fake = self.faker("Usuario")
         for i in range(1, n + 1):
-            self.tables["Usuario"].append(Usuario(
+            yield Usuario(
                 UsuarioID=i,
                 Email=fake.email(),
                 Telefone=fake.phone_number(),
@@ -166,63 +270,62 @@ class DataBase:
                 Municipio=fake.city(),
                 Estado=fake.state(),
                 Logradouro=fake.street_address()
-            ))
+            )
 
     def create_table_filme(self, n: int):
-        fake = faker.Faker()
+        fake = self.faker("Filme")
         for i in range(1, n + 1):
-            self.tables["Filme"].append(Filme(
+            yield Filme(
                 FilmeID=i,
                 FilmeNome=fake.word(),
                 DuracaoMin=fake.random_int(min=60, max=180),
                 AnoDe_Lancamento=fake.year()
-            ))
+            )
 
     def create_table_avaliacao(self, n: int):
-        fake = faker.Faker()
-        pairs = list(itertools.product(self.tables["Usuario"], self.tables["Filme"]))
-        pairs = fake.random.sample(pairs, k=min(n, len(pairs)))
-        for i, (usuario, filme) in enumerate(pairs):
-            self.tables["Avaliacao"].append(Avaliacao(
+        fake = self.faker("Avaliacao")
+        pairs = sample_pairs(fake.random, self.keys["Usuario"], self.keys["Filme"], n)
+        for i, (usuario_id, filme_id) in enumerate(pairs):
+            yield Avaliacao(
                 AvaliacaoID=i,
-                UsuarioID=usuario.UsuarioID,
-                FilmeID=filme.FilmeID,
+                UsuarioID=usuario_id,
+                FilmeID=filme_id,
                 Nota=fake.random_int(min=1, max=5),
                 Comentario=fake.text(),
                 AvaliacaoData=fake.date_between_dates(
                     date_start=self.START_DATE,
                     date_end=self.END_DATE
                 )
-            ))
+            )
 
     def create_table_produtora(self, n: int):
-        fake = faker.Faker()
+        fake = self.faker("Produtora")
         for i in range(1, n + 1):
-            self.tables["Produtora"].append(Produtora(
+            yield Produtora(
                 ProdutoraID=i,
                 ProdutoraNome=fake.company()
-            ))
+            )
 
     def create_table_cargo(self, n: int):
-        fake = faker.Faker()
+        fake = self.faker("Cargo")
         for i in range(1, n + 1):
-            self.tables["Cargo"].append(Cargo(
+            yield Cargo(
                 CargoID=i,
                 CargoNome=fake.job()
-            ))
+            )
 
     def create_table_funcionario(self, n: int):
-        fake = faker.Faker()
+        fake = self.faker("Funcionario")
         for i in range(1, n + 1):
-            self.tables["Funcionario"].append(Funcionario(
+            yield Funcionario(
                 FuncionarioID=i,
                 FuncionarioNome=fake.name(),
-                CargoID=fake.random.sample(self.tables["Cargo"], k=1)[0].CargoID,
+                CargoID=fake.random.sample(self.keys["Cargo"], k=1)[0],
                 Salario=round(fake.random_number(digits=5, fix_len=False) + fake.random.random(), 2)
-            ))
+            )
 
     def create_table_assinatura(self, n: int):
-        fake = faker.Faker()
+        fake = self.faker("Assinatura")
         for i in range(1, n + 1):
             start_date, end_date = sorted((
                 fake.date_between_dates(
@@ -234,135 +337,182 @@ class DataBase:
                     date_end=self.END_DATE
                 )
             ))
-            self.tables["Assinatura"].append(Assinatura(
+            yield Assinatura(
                 AssinaturaID=i,
-                PlanoID=fake.random.sample(self.tables["Plano"], k=1)[0].PlanoID,
+                PlanoID=fake.random.sample(self.keys["Plano"], k=1)[0],
                 DataInicio=start_date,
                 DataFim=end_date,
                 Status=fake.random_int(min=0, max=1)
-            ))
+            )
 
     def create_table_film_pagto_roy(self, n: int):
-        fake = faker.Faker()
-        pairs = list(itertools.product(self.tables["Filme"], self.tables["Produtora"]))
-        pairs = fake.random.sample(pairs, k=min(n, len(pairs)))
-        for i, (filme, produtora) in enumerate(pairs):
-            self.tables["FilmPagtoRoy"].append(FilmPagtoRoy(
-                FilmeID=filme.FilmeID,
+        fake = self.faker("FilmPagtoRoy")
+        pairs = sample_pairs(fake.random, self.keys["Filme"], self.keys["Produtora"], n)
+        for i, (filme_id, produtora_id) in enumerate(pairs):
+            yield FilmPagtoRoy(
+                FilmeID=filme_id,
                 DataPagto=fake.date_between_dates(
                     date_start=self.START_DATE,
                     date_end=self.END_DATE
                 ),
-                ProdutoraID=produtora.ProdutoraID,
+                ProdutoraID=produtora_id,
                 ValorPagto=fake.random_int(min=1, max=100)
-            ))
+            )
 
     def create_table_usr_pagto(self, n: int):
-        fake = faker.Faker()
-        pairs = list(itertools.product(self.tables["Usuario"], self.tables["Assinatura"]))
-        pairs = fake.random.sample(pairs, k=min(n, len(pairs)))
-        for i, (usuario, assinatura) in enumerate(pairs):
-            self.tables["UsrPagto"].append(UsrPagto(
+        fake = self.faker("UsrPagto")
+        pairs = sample_pairs(fake.random, self.keys["Usuario"], self.keys["Assinatura"], n)
+        for i, (usuario_id, assinatura_id) in enumerate(pairs):
+            yield UsrPagto(
                 UsrPagtoID=i,
-                UsuarioID=usuario.UsuarioID,
-                AssinaturaID=assinatura.AssinaturaID,
+                UsuarioID=usuario_id,
+                AssinaturaID=assinatura_id,
                 ValorPago=fake.random_int(min=1, max=100),
                 DataPagto=fake.date_between_dates(
                     date_start=self.START_DATE,
                     date_end=self.END_DATE
                 )
-            ))
+            )
 
     def create_table_assiste(self, n: int):
-        fake = faker.Faker()
-        pairs = list(itertools.product(self.tables["Usuario"], self.tables["Filme"]))
-        pairs = fake.random.sample(pairs, k=min(n, len(pairs)))
-        for i, (usuario, filme) in enumerate(pairs):
-            self.tables["Assiste"].append(Assiste(
-                UsuarioID=usuario.UsuarioID,
-                FilmeID=filme.FilmeID,
+        fake = self.faker("Assiste")
+        pairs = sample_pairs(fake.random, self.keys["Usuario"], self.keys["Filme"], n)
+        for i, (usuario_id, filme_id) in enumerate(pairs):
+            yield Assiste(
+                UsuarioID=usuario_id,
+                FilmeID=filme_id,
                 Data=fake.date_between_dates(
                     date_start=self.START_DATE,
                     date_end=self.END_DATE
                 )
-            ))
+            )
 
     def create_table_modera(self, n: int):
-        fake = faker.Faker()
-        pairs = list(itertools.product(self.tables["Funcionario"], self.tables["Avaliacao"]))
-        pairs = fake.random.sample(pairs, k=min(n, len(pairs)))
-        for i, (funcionario, avaliacao) in enumerate(pairs):
-            self.tables["Modera"].append(Modera(
-                FuncionarioID=funcionario.FuncionarioID,
-                AvaliacaoID=avaliacao.AvaliacaoID,
-            ))
+        fake = self.faker("Modera")
+        pairs = sample_pairs(fake.random, self.keys["Funcionario"], self.keys["Avaliacao"], n)
+        for i, (funcionario_id, avaliacao_id) in enumerate(pairs):
+            yield Modera(
+                FuncionarioID=funcionario_id,
+                AvaliacaoID=avaliacao_id,
+            )
 
     def create_table_gerencia_conteudo(self, n: int):
-        fake = faker.Faker()
-        pairs = list(itertools.product(self.tables["Funcionario"], self.tables["Filme"]))
-        pairs = fake.random.sample(pairs, k=min(n, len(pairs)))
-        for i, (funcionario, filme) in enumerate(pairs):
-            self.tables["Gerencia_Conteudo"].append(Gerencia_Conteudo(
-                FuncionarioID=funcionario.FuncionarioID,
-                FilmeID=filme.FilmeID,
-            ))
+        fake = self.faker("Gerencia_Conteudo")
+        pairs = sample_pairs(fake.random, self.keys["Funcionario"], self.keys["Filme"], n)
+        for i, (funcionario_id, filme_id) in enumerate(pairs):
+            yield Gerencia_Conteudo(
+                FuncionarioID=funcionario_id,
+                FilmeID=filme_id,
+            )
 
     def create_table_filme_genero_filme(self, n: int):
-        fake = faker.Faker()
-        for filme in fake.random.sample(self.tables["Filme"], k=n):
-            self.tables["Filme_Genero"].append(Filme_GeneroFilme(
-                FilmeID=filme.FilmeID,
+        fake = self.faker("Filme_Genero")
+        for filme_id in fake.random.sample(self.keys["Filme"], k=n):
+            yield Filme_GeneroFilme(
+                FilmeID=filme_id,
                 GeneroFilme=fake.word()
-            ))
+            )
 
     def create_table_filme_diretor_filme(self, n: int):
-        fake = faker.Faker()
-        for filme in fake.random.sample(self.tables["Filme"], k=n):
-            self.tables["Filme_Diretor"].append(Filme_DiretorFilme(
-                FilmeID=filme.FilmeID,
+        fake = self.faker("Filme_Diretor")
+        for filme_id in fake.random.sample(self.keys["Filme"], k=n):
+            yield Filme_DiretorFilme(
+                FilmeID=filme_id,
                 DiretorFilme=fake.name()
-            ))
+            )
 
     def create_table_filme_ator_filme(self, n: int):
-        fake = faker.Faker()
-        for filme in fake.random.sample(self.tables["Filme"], k=n):
-            self.tables["Filme_Ator"].append(Filme_AtorFilme(
-                FilmeID=filme.FilmeID,
+        fake = self.faker("Filme_Ator")
+        for filme_id in fake.random.sample(self.keys["Filme"], k=n):
+            yield Filme_AtorFilme(
+                FilmeID=filme_id,
                 AtorFilme=fake.name()
-            ))
-
-    def create_tables(self):
-        self.create_table_plano()
-        self.create_table_usuario(2000)
-        self.create_table_filme(500)
-        self.create_table_produtora(20)
-        self.create_table_cargo(15)
-        self.create_table_funcionario(1000)
-
-        self.create_table_assinatura(1500)
-        self.create_table_avaliacao(20000)
-        self.create_table_film_pagto_roy(400)
-        self.create_table_usr_pagto(6000)
-        self.create_table_assiste(15000)
-        self.create_table_modera(20)
-        self.create_table_gerencia_conteudo(50)
-
-        self.create_table_filme_genero_filme(100)
-        self.create_table_filme_diretor_filme(100)
-        self.create_table_filme_ator_filme(100)
-
-    def write_dml(self, path: str):
-        with open(path, "w", encoding="utf-8") as f:
-            f.write("set search_path=oper_alv;\n\n")
-            f.write("-- DML Statements\n\n")
-            for table_name, table in self.tables.items():
-                f.write(f"-- Table: {table_name}\n")
-                for value in table:
-                    f.write(str(value) + "\n")
-                f.write("\n")
+            )
+
+    def iter_rows(self, table_name: str, n: Optional[int] = None) -> Iterator[TableRow]:
+        _, _, method, default_n, _ = next(step for step in self.PLAN if step[0] == table_name)
+        n = default_n if n is None else n
+        rows = getattr(self, method)() if n is None else getattr(self, method)(n)
+        key_column = self.KEY_COLUMNS.get(table_name)
+        if key_column is None:
+            yield from rows
+            return
+        keys = self.keys[table_name]
+        for row in rows:
+            keys.append(getattr(row, key_column))
+            yield row
+
+    def write_section(self, f, table_name: str, section):
+        row_class = next(step[1] for step in self.PLAN if step[0] == table_name)
+        section(f, table_name, row_class, self.iter_rows(table_name))
+
+    def write(self, path: str, header: str, section, workers: int = 1):
+        if workers <= 1:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(header)
+                for table_name, *_ in self.PLAN:
+                    self.write_section(f, table_name, section)
+            return
+        if self.seed is None:
+            raise ValueError("Geração paralela exige uma seed (DataBase(seed=...)).")
+
+        # Each worker streams one table to its own part file and sends back only
+        # the table's key column; parts are concatenated in foreign-key order.
+        with tempfile.TemporaryDirectory(dir=Path(path).resolve().parent) as parts_dir:
+            parts = {table_name: Path(parts_dir) / f"{table_name}.part" for table_name, *_ in self.PLAN}
+            pending = list(self.PLAN)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                while pending:
+                    ready = [step for step in pending if all(dep in self.keys for dep in step[4])]
+                    futures = {
+                        table_name: pool.submit(
+                            _write_table_part, self.seed, table_name, section, parts[table_name],
+                            {dep: self.keys[dep] for dep in deps},
+                        )
+                        for table_name, _, _, _, deps in ready
+                    }
+                    for table_name, future in futures.items():
+                        keys = future.result()
+                        if table_name in self.KEY_COLUMNS:
+                            self.keys[table_name] = keys
+                    pending = [step for step in pending if step not in ready]
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(header)
+                for table_name, *_ in self.PLAN:
+                    with open(parts[table_name], encoding="utf-8") as part:
+                        shutil.copyfileobj(part, f)
+
+    def write_dml(self, path: str, batch_size: int = 1, workers: int = 1):
+        self.write(
+            path,
+            "set search_path=oper_alv;\n\n-- DML Statements\n\n",
+            partial(write_insert_section, batch_size=batch_size),
+            workers,
+        )
+
+    def write_copy(self, path: str, workers: int = 1):
+        self.write(path, "set search_path=oper_alv;\n\n", write_copy_section, workers)
+
+
+def _write_table_part(seed: int, table_name: str, section, path: Path, parent_keys: dict) -> array:
+    db = DataBase(seed)
+    db.keys.update(parent_keys)
+    with open(path, "w", encoding="utf-8") as f:
+        db.write_section(f, table_name, section)
+    return db.keys[table_name]
 
 
 if __name__ == "__main__":
-    db = DataBase()
-    db.create_tables()
-    db.write_dml("DML_populate_tables_huge_ALV.sql")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--format", choices=("insert", "copy"), default="insert")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--output", default="DML_populate_tables_huge_ALV.sql")
+    args = parser.parse_args()
+
+    db = DataBase(args.seed)
+    if args.format == "copy":
+        db.write_copy(args.output, args.workers)
+    else:
+        db.write_dml(args.output, args.batch_size, args.workers)
@@ -0,0 +1,53 @@
+"""Incrementally load the DW (dw_alv) from the operational schema (oper_alv).
+
+Only rows added since the previous run are read; ``--full`` re-merges every
+row without renumbering any surrogate key.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+
+from src.recommender.config import load_database_config
+from src.recommender.database import build_engine
+from src.recommender.etl import run_incremental_etl
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignora as marcas d'água e reprocessa todas as linhas de oper_alv.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Tabelas carregadas em paralelo (uma conexão cada).",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+    )
+    logger = logging.getLogger("run_etl")
+    engine = build_engine(load_database_config(), pool_size=args.workers + 1)
+    try:
+        stats = run_incremental_etl(engine, full=args.full, max_workers=args.workers)
+    except Exception as exc:  # pragma: no cover - defensive logging path
+        logger.exception("Falha ao executar o ETL incremental: %s", exc)
+        return 1
+    finally:
+        engine.dispose()
+    logger.info(
+        "ETL concluído: %d linhas em %d etapas.", sum(s.rows for s in stats), len(stats)
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
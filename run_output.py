@@ -1,30 +1,38 @@
-import pandas as pd
-from tqdm import tqdm
+"""Export the DW tables to Excel, Parquet or CSV."""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from pathlib import Path
 
 from src.recommender.config import load_database_config
-from src.recommender.database import read_table, build_engine
+from src.recommender.database import build_engine
+from src.recommender.export import EXPORT_FORMATS, export_tables
 
+DEFAULT_OUTPUTS = {"xlsx": Path("output.xlsx"), "parquet": Path("output"), "csv": Path("output")}
 
-def save_all_to_excel():
+
+def save_all(fmt: str = "xlsx", output: Path | None = None, workers: int = 4):
     config = load_database_config()
-    engine = build_engine(config)
+    engine = build_engine(config, pool_size=workers)
+    return export_tables(
+        engine, output or DEFAULT_OUTPUTS[fmt], fmt=fmt, max_workers=workers
+    )
 
-    tables = [
-        "Usuario",
-        "Filme",
-        "Endereco",
-        "Calendario",
-        "Produtora",
-        "Avaliacao",
-        "Receita",
-        "ModelPrediction",
-    ]
 
-    with pd.ExcelWriter('output.xlsx') as writer:
-        for table in tqdm(tables, desc="Saving tables to Excel"):
-            df = read_table(engine, f"dw_alv.{table}")
-            df.to_excel(writer, sheet_name=table, index=False) 
+def save_all_to_excel():
+    return save_all("xlsx")
 
 
 if __name__ == '__main__':
-    save_all_to_excel()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="xlsx")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    save_all(args.format, args.output, args.workers)
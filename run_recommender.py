@@ -1,28 +1,227 @@
-"""CLI entrypoint to train and export the IMDb recommendation model."""
+"""CLI for the IMDb recommendation model: imdb, train, infer, export and serve.
+
+``imdb`` builds the candidates parquet from the local IMDb dumps, ``train``
+fits (or reuses) and registers the model, ``infer`` scores the catalog with
+the latest registered model, ``export`` dumps the DW tables and ``serve``
+answers recommendation lookups over HTTP. Without a subcommand the
+full train + infer pipeline runs. Each subcommand imports only the modules it
+uses, so ``--help``, exports and serving never load scikit-learn.
+"""
 
 from __future__ import annotations
 
+import argparse
 import logging
 import sys
+from typing import List, Optional
+
+from src.recommender.config import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    DEFAULT_RELOAD_INTERVAL,
+    EXPORT_FORMATS,
+)
+
+LOGGER = logging.getLogger("run_recommender")
+
+
+def _default(value: object, subcommand: bool) -> object:
+    return argparse.SUPPRESS if subcommand else value
+
+
+def _run_options(subcommand: bool = False) -> argparse.ArgumentParser:
+    """Options of the pipeline, also accepted after ``train``/``infer``.
+
+    The subcommands' copies have no defaults (``SUPPRESS``), so they only set
+    what is given after the subcommand and keep what was given before it.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        default=_default(False, subcommand),
+        help="Registra o pico de alocações Python (tracemalloc) de cada etapa.",
+    )
+    parser.add_argument(
+        "--profile-stage",
+        action="append",
+        default=_default([], subcommand),
+        help="Executa a etapa sob cProfile e grava reports/<etapa>.prof (repetível).",
+    )
+    parser.add_argument(
+        "--compact-dtypes",
+        action="store_true",
+        default=_default(False, subcommand),
+        help="Monta o dataset de treino a partir dos CSVs com chaves int32, float32 e categorias.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        default=_default(True, subcommand),
+        help="Ignora o cache de etapas (dataset de treino e pontuações dos candidatos).",
+    )
+    return parser
+
+
+def _predict_options(subcommand: bool = False) -> argparse.ArgumentParser:
+    """Scoring options of the pipeline and ``infer`` (see :func:`_run_options`)."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--per-user",
+        action="store_true",
+        default=_default(False, subcommand),
+        help="Gera recomendações por usuário, sem títulos já avaliados.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=_default(1, subcommand),
+        help="Processos usados para pontuar os blocos de candidatos.",
+    )
+    return parser
+
+
+def _metrics(args: argparse.Namespace):
+    from src.recommender.metrics import RunMetrics
+
+    return RunMetrics(trace_memory=args.trace_memory, profile_stages=args.profile_stage)
+
+
+def _pipeline(args: argparse.Namespace) -> None:
+    from src.recommender.pipeline import run_pipeline
+
+    run_pipeline(
+        per_user=args.per_user,
+        workers=args.workers,
+        compact=args.compact_dtypes,
+        use_cache=args.use_cache,
+        metrics=_metrics(args),
+    )
+
+
+def _imdb(args: argparse.Namespace) -> None:
+    from src.recommender.imdb import build_imdb_movies
+
+    build_imdb_movies(args.source, args.output)
+
+
+def _train(args: argparse.Namespace) -> None:
+    from src.recommender.pipeline import run_training
+
+    run_training(
+        compact=args.compact_dtypes, use_cache=args.use_cache, metrics=_metrics(args)
+    )
 
-from src.recommender.pipeline import run_pipeline
 
+def _infer(args: argparse.Namespace) -> None:
+    from src.recommender.pipeline import run_inference
+
+    run_inference(
+        per_user=args.per_user,
+        workers=args.workers,
+        compact=args.compact_dtypes,
+        use_cache=args.use_cache,
+        metrics=_metrics(args),
+    )
+
+
+def _export(args: argparse.Namespace) -> None:
+    from run_output import save_all
+
+    save_all(args.format, args.output, args.workers)
+
+
+def _serve(args: argparse.Namespace) -> None:
+    import asyncio
+
+    from src.recommender.serving import serve_forever
+
+    try:
+        asyncio.run(serve_forever(args.path, args.host, args.port, args.reload_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from pathlib import Path
+
+    from src.recommender.config import (
+        imdb_dumps_dir,
+        imdb_movies_path,
+        output_predictions_path,
+    )
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, parents=[_run_options(), _predict_options()]
+    )
+    run_options, predict_options = _run_options(True), _predict_options(True)
+    parser.set_defaults(handler=_pipeline)
+    commands = parser.add_subparsers(title="subcomandos")
+
+    imdb = commands.add_parser(
+        "imdb", help="Gera o parquet de candidatos a partir dos dumps .tsv.gz do IMDb."
+    )
+    imdb.add_argument(
+        "--source",
+        type=Path,
+        default=imdb_dumps_dir(),
+        help="Diretório com title.basics.tsv.gz e title.ratings.tsv.gz.",
+    )
+    imdb.add_argument("--output", type=Path, default=imdb_movies_path())
+    imdb.set_defaults(handler=_imdb)
+
+    train = commands.add_parser(
+        "train", parents=[run_options], help="Treina e registra o modelo."
+    )
+    train.set_defaults(handler=_train)
+
+    infer = commands.add_parser(
+        "infer",
+        parents=[run_options, predict_options],
+        help="Gera e publica as previsões com o último modelo registrado.",
+    )
+    infer.set_defaults(handler=_infer)
+
+    export = commands.add_parser("export", help="Exporta as tabelas do DW.")
+    export.add_argument("--format", choices=EXPORT_FORMATS, default="xlsx")
+    export.add_argument("--output", type=Path, default=None)
+    export.add_argument("--workers", type=int, default=4)
+    export.set_defaults(handler=_export)
+
+    serve = commands.add_parser(
+        "serve",
+        help="Serve as recomendações via HTTP "
+        "(GET /recommendations?estado=Texas&n=10&genero=Drama, /states e /health).",
+    )
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--path", type=Path, default=output_predictions_path())
+    serve.add_argument(
+        "--reload-interval",
+        type=float,
+        default=DEFAULT_RELOAD_INTERVAL,
+        help="Segundos entre verificações de um novo arquivo de previsões.",
+    )
+    serve.set_defaults(handler=_serve)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
 
-def main() -> int:
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
     )
-    logger = logging.getLogger("run_recommender")
     try:
-        run_pipeline()
+        args.handler(args)
     except Exception as exc:  # pragma: no cover - defensive logging path
-        logger.exception("Falha ao executar o pipeline de recomendação: %s", exc)
+        LOGGER.exception("Falha ao executar o pipeline de recomendação: %s", exc)
         return 1
-    logger.info("Pipeline executado com sucesso.")
+    LOGGER.info("Comando executado com sucesso.")
     return 0
 
 
 if __name__ == "__main__":
     sys.exit(main())
-
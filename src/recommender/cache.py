@@ -0,0 +1,182 @@
+"""Content-addressed cache for the outputs of expensive pipeline stages.
+
+Each entry is an uncompressed Arrow IPC file named after a hash of everything
+its stage read (file contents, model fingerprint, parameters, library
+versions), so an entry is never stale: changed inputs simply produce another
+key. Entries are read through a memory map, numeric columns come back as
+zero-copy NumPy views, and the least recently used ones are deleted once the
+cache grows past its size limit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+LOGGER = logging.getLogger(__name__)
+
+# Bump when a stage's code changes the content it caches.
+CACHE_VERSION = 1
+_SUFFIX = ".arrow"
+_SCORE_PREFIX = "__score_"
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's contents, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StageCache:
+    """Arrow files under ``directory/<stage>/<key>.arrow``, evicted LRU past ``max_bytes``.
+
+    ``hits`` and ``misses`` count lookups per stage for the run's report.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def key(self, stage: str, *inputs: object) -> str:
+        """Hash the stage name, the cache and library versions and ``inputs`` (via ``repr``)."""
+        digest = hashlib.sha256()
+        parts = (CACHE_VERSION, pd.__version__, pa.__version__, stage, *inputs)
+        for part in parts:
+            digest.update(repr(part).encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.directory / stage / f"{key}{_SUFFIX}"
+
+    def read(self, stage: str, key: str) -> Optional[pa.Table]:
+        """Return the memory-mapped entry, or ``None`` (a miss) if it is absent."""
+        path = self._path(stage, key)
+        if not path.exists():
+            self.misses[stage] = self.misses.get(stage, 0) + 1
+            LOGGER.info("Cache de %s: falha (%s).", stage, key[:12])
+            return None
+        self.hits[stage] = self.hits.get(stage, 0) + 1
+        LOGGER.info("Cache de %s: acerto (%s).", stage, key[:12])
+        # The modification time is the LRU clock.
+        os.utime(path)
+        return ipc.open_file(pa.memory_map(str(path))).read_all()
+
+    @contextmanager
+    def writer(self, stage: str, key: str) -> Iterator[Callable[[pa.RecordBatch], None]]:
+        """Yield a function that appends record batches (one schema) to the entry.
+
+        The file only takes its final name when the block exits normally, so a
+        stage that fails or is abandoned halfway leaves no entry behind.
+        """
+        path = self._path(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        sink = pa.OSFile(str(tmp_path), "wb")
+        writers: List[ipc.RecordBatchFileWriter] = []
+
+        def write_batch(batch: pa.RecordBatch) -> None:
+            if not writers:
+                writers.append(ipc.new_file(sink, batch.schema))
+            writers[0].write_batch(batch)
+
+        try:
+            yield write_batch
+            for writer in writers:
+                writer.close()
+        except BaseException:
+            sink.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        sink.close()
+        if not writers:
+            tmp_path.unlink(missing_ok=True)
+            return
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """Delete least recently used entries until the cache fits; return the bytes freed."""
+        entries = [
+            (stat.st_mtime_ns, stat.st_size, path)
+            for path in self.directory.glob(f"*/*{_SUFFIX}")
+            for stat in [path.stat()]
+        ]
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            freed += size
+        if freed:
+            LOGGER.info("Cache de etapas: %.1f MB liberados (LRU).", freed / 2**20)
+        return freed
+
+    def summary(self) -> str:
+        stages = sorted({*self.hits, *self.misses})
+        return ", ".join(
+            f"{stage} {self.hits.get(stage, 0)} acerto(s)/{self.misses.get(stage, 0)} falha(s)"
+            for stage in stages
+        )
+
+
+def cached_frame(
+    cache: Optional[StageCache], stage: str, key: str, build: Callable[[], pd.DataFrame]
+) -> Tuple[pd.DataFrame, bool]:
+    """Return ``build()``'s frame through the cache and whether it was a hit."""
+    if cache is None:
+        return build(), False
+    table = cache.read(stage, key)
+    if table is not None:
+        return table.to_pandas(), True
+    frame = build()
+    with cache.writer(stage, key) as write_batch:
+        for batch in pa.Table.from_pandas(frame, preserve_index=False).to_batches():
+            write_batch(batch)
+    return frame, False
+
+
+def cached_scores(
+    cache: StageCache,
+    key: str,
+    n_states: int,
+    scored: Iterable[Tuple[pd.DataFrame, np.ndarray]],
+) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+    """Replay cached ``(chunk, state scores)`` pairs, or record ``scored`` as it passes.
+
+    Each chunk is one record batch: the candidate columns followed by one score
+    column per state. On a hit ``scored`` is never iterated, so no candidate is
+    read or scored; on a miss chunks are written as they stream through.
+    """
+    table = cache.read("scores", key)
+    if table is not None:
+        names = [name for name in table.column_names if not name.startswith(_SCORE_PREFIX)]
+        for batch in table.to_batches():
+            columns = [batch.column(f"{_SCORE_PREFIX}{i}").to_numpy() for i in range(n_states)]
+            yield batch.select(names).to_pandas(), np.vstack(columns)
+        return
+
+    with cache.writer("scores", key) as write_batch:
+        for chunk, scores in scored:
+            batch = pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+            for i, row in enumerate(scores):
+                batch = batch.append_column(f"{_SCORE_PREFIX}{i}", pa.array(row))
+            write_batch(batch)
+            yield chunk, scores
@@ -4,14 +4,20 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
-import dotenv
 
-# Load environment variables once per process. This mirrors how Google/Meta projects
-# centralize configuration loading instead of scattering `dotenv.load_dotenv()` in
-# multiple modules.
-dotenv.load_dotenv()
+@lru_cache(maxsize=None)
+def load_environment() -> None:
+    """Load ``.env`` into the process environment, once, on first use.
+
+    Deferred from import time so commands that never read the environment
+    (``--help``, serving a parquet) do not pay for ``python-dotenv``.
+    """
+    import dotenv
+
+    dotenv.load_dotenv()
 
 
 @dataclass(frozen=True)
@@ -34,6 +40,7 @@ class DatabaseConfig:
 
 def load_database_config() -> DatabaseConfig:
     """Instantiate the DB config from environment variables."""
+    load_environment()
     host = os.getenv("IP")
     password = os.getenv("PASSWORD", "")
     if not host or not password:
@@ -41,16 +48,64 @@ def load_database_config() -> DatabaseConfig:
     return DatabaseConfig(host=host, password=password)
 
 
+def model_engine() -> str:
+    """Return the model engine to train, from ``MODEL_ENGINE`` (default: random forest)."""
+    load_environment()
+    return os.getenv("MODEL_ENGINE", "random_forest")
+
+
 def imdb_movies_path() -> Path:
     """Return the canonical location of the parquet file with IMDb metadata."""
     return Path("aws") / "imdb_movies.parquet"
 
 
+def imdb_dumps_dir() -> Path:
+    """Return the directory holding the downloaded IMDb ``.tsv.gz`` dumps."""
+    return Path("data") / "imdb"
+
+
 def output_predictions_path() -> Path:
     """Return the path used to export recommendations for sharing/downstream ETL."""
     return Path("aws") / "imdb_model_infer.parquet"
 
 
+def output_user_predictions_path() -> Path:
+    """Return the path used to export the per-user recommendations."""
+    return Path("aws") / "imdb_model_infer_usuario.parquet"
+
+
+def model_registry_dir() -> Path:
+    """Return the directory where fitted pipelines are stored by fingerprint."""
+    return Path("models")
+
+
+def training_snapshot_dir() -> Path:
+    """Return the directory holding the incrementally refreshed DW training snapshot."""
+    return Path("snapshots") / "training"
+
+
+def stage_cache_dir() -> Path:
+    """Return the directory of the content-addressed stage cache."""
+    return Path("cache") / "stages"
+
+
+def stage_cache_max_bytes() -> int:
+    """Return the stage cache size limit, from ``STAGE_CACHE_MAX_MB`` (default: 2048)."""
+    load_environment()
+    return int(os.getenv("STAGE_CACHE_MAX_MB", "2048")) * 2**20
+
+
+def metrics_report_path() -> Path:
+    """Return where the per-stage metrics of the last pipeline run are written."""
+    return Path("reports") / "pipeline_metrics.json"
+
+
 DEFAULT_TABLE_NAME = "model_infer"
+DEFAULT_USER_TABLE_NAME = "model_infer_usuario"
 DEFAULT_SCHEMA = "imdb_alv"
 
+EXPORT_FORMATS = ("xlsx", "parquet", "csv")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_RELOAD_INTERVAL = 5.0
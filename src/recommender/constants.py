@@ -1,8 +1,15 @@
 """Central location for feature definitions shared across modules."""
 
-FEATURE_COLUMNS = ["anodelancamento", "duracaomin", "generonome", "estado"]
+FEATURE_COLUMNS = ["anodelancamento", "duracaomin", "generonome", "generos", "estado"]
 NUMERIC_COLUMNS = ["anodelancamento", "duracaomin"]
 CATEGORICAL_COLUMNS = ["generonome", "estado"]
+# Comma-separated list of every genre of a title, multi-hot encoded by the
+# sparse engines (``generonome`` keeps only the leading one).
+GENRE_LIST_COLUMN = "generos"
+GENRE_SEPARATOR = ","
 TOP_K_PER_STATE = 25
 CANDIDATE_LIMIT = 400
-
+# Number of (state, movie) rows sent to the regressor per ``predict`` call.
+SCORING_BATCH_SIZE = 65_536
+# Raw IMDb rows read per chunk when streaming the full candidate catalog.
+CANDIDATE_CHUNK_SIZE = 50_000
@@ -2,21 +2,26 @@
 
 from __future__ import annotations
 
+import io
 import re
-from typing import Final
+from typing import Any, Final, Iterator, Mapping, Optional, Sequence
 
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Connection, Engine
 
 from .config import DatabaseConfig
 
 _SCHEMA_REGEX: Final[re.Pattern[str]] = re.compile(r"^[A-Za-z0-9_]+$")
+# Rows serialized per COPY call, bounding the size of the in-memory CSV buffer.
+COPY_CHUNK_ROWS: Final[int] = 100_000
+# Default chunk size for streamed reads.
+READ_CHUNK_ROWS: Final[int] = 100_000
 
 
-def build_engine(config: DatabaseConfig) -> Engine:
+def build_engine(config: DatabaseConfig, pool_size: int = 5) -> Engine:
     """Create a SQLAlchemy engine using the provided configuration."""
-    return create_engine(config.sqlalchemy_url)
+    return create_engine(config.sqlalchemy_url, pool_size=pool_size)
 
 
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -26,11 +31,126 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     return renamed
 
 
-def read_table(engine: Engine, table_name: str) -> pd.DataFrame:
-    """Fetch an entire table/SQL expression into a Pandas DataFrame."""
-    query = f"SELECT * FROM {table_name};"
-    df = pd.read_sql_query(query, engine)
-    return normalize_columns(df)
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast integer columns to the smallest width that fits and floats to float32."""
+    for col in df.columns:
+        if pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype("float32")
+    return df
+
+
+def _select_statement(
+    table_name: str, columns: Optional[Sequence[str]], where: Optional[str]
+) -> str:
+    for name in [*table_name.split("."), *(columns or [])]:
+        if not _SCHEMA_REGEX.match(name):
+            raise ValueError(
+                "Invalid identifier. Allowed characters: letters, numbers, underscore."
+            )
+    projection = ", ".join(columns) if columns else "*"
+    query = f"SELECT {projection} FROM {table_name}"
+    if where:
+        query += f" WHERE {where}"
+    return query
+
+
+def read_table(
+    engine: Engine,
+    table_name: str,
+    columns: Optional[Sequence[str]] = None,
+    *,
+    where: Optional[str] = None,
+    params: Optional[Mapping[str, Any]] = None,
+    compact: bool = False,
+) -> pd.DataFrame:
+    """Fetch a table into a Pandas DataFrame.
+
+    ``columns`` projects the select list and ``where`` is a SQL predicate whose
+    values must be passed as bound ``:name`` parameters through ``params``.
+    """
+    query = text(_select_statement(table_name, columns, where))
+    df = normalize_columns(pd.read_sql_query(query, engine, params=params))
+    return compact_dtypes(df) if compact else df
+
+
+def iter_table(
+    engine: Engine,
+    table_name: str,
+    columns: Optional[Sequence[str]] = None,
+    *,
+    where: Optional[str] = None,
+    params: Optional[Mapping[str, Any]] = None,
+    chunksize: int = READ_CHUNK_ROWS,
+    fetch_size: Optional[int] = None,
+    compact: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """Stream a table in chunks of ``chunksize`` rows.
+
+    Rows come from a server-side (named) cursor that fetches ``fetch_size`` rows
+    per round trip (defaults to ``chunksize``), so only one chunk is held in
+    memory at a time. Pass ``compact=False`` when every chunk must keep the same
+    dtypes (e.g. when appending to a single Parquet file).
+    """
+    query = text(_select_statement(table_name, columns, where))
+    with engine.connect() as conn:
+        conn = conn.execution_options(yield_per=fetch_size or chunksize)
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+            chunk = normalize_columns(chunk)
+            yield compact_dtypes(chunk) if compact else chunk
+
+
+def _quote(identifier: str) -> str:
+    """Quote an identifier the way ``to_sql`` created it (case preserved)."""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _copy_into(conn: Connection, df: pd.DataFrame, qualified_table: str) -> int:
+    """Stream ``df`` into an existing table with ``COPY ... FROM STDIN`` (CSV).
+
+    Returns the number of CSV bytes sent to the server.
+    """
+    columns = ", ".join(_quote(col) for col in df.columns)
+    statement = f"COPY {qualified_table} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    cursor = conn.connection.cursor()
+    sent = 0
+    try:
+        for start in range(0, len(df), COPY_CHUNK_ROWS):
+            buffer = io.BytesIO()
+            df.iloc[start : start + COPY_CHUNK_ROWS].to_csv(
+                buffer, header=False, index=False, encoding="utf-8"
+            )
+            sent += buffer.tell()
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+    finally:
+        cursor.close()
+    return sent
+
+
+def _bulk_load(
+    conn: Connection, df: pd.DataFrame, schema: str, table_name: str
+) -> Optional[int]:
+    """Create ``schema.table_name`` from the frame's dtypes and fill it in bulk.
+
+    PostgreSQL gets ``COPY`` (returning the bytes sent); other backends (e.g. a
+    file-backed SQLite used as a stand-in) fall back to multi-row ``INSERT``
+    batches and return ``None``.
+    """
+    df.head(0).to_sql(table_name, conn, schema=schema, if_exists="replace", index=False)
+    if conn.dialect.name == "postgresql":
+        return _copy_into(conn, df, f"{_quote(schema)}.{_quote(table_name)}")
+    df.to_sql(
+        table_name,
+        conn,
+        schema=schema,
+        if_exists="append",
+        index=False,
+        method="multi",
+        chunksize=1_000,
+    )
+    return None
 
 
 def write_table(
@@ -40,13 +160,61 @@ def write_table(
     schema: str,
     table_name: str,
     if_exists: str = "replace",
-) -> None:
-    """Persist a dataframe to PostgreSQL with defensive schema validation."""
-    if not _SCHEMA_REGEX.match(schema):
-        raise ValueError(
-            "Invalid schema name. Allowed characters: letters, numbers, underscore."
-        )
+    index_columns: Sequence[str] = (),
+) -> Optional[int]:
+    """Persist a dataframe to PostgreSQL with defensive schema validation.
+
+    With ``if_exists="replace"`` the data is bulk-loaded into a staging table,
+    indexed there and swapped in with a rename inside the same transaction, so
+    readers keep seeing the previous table until the commit. Returns the bytes
+    sent with ``COPY``, or ``None`` when the backend loaded rows another way.
+    """
+    for kind, name in (("schema", schema), ("table", table_name)):
+        if not _SCHEMA_REGEX.match(name):
+            raise ValueError(
+                f"Invalid {kind} name {name!r}. "
+                "Allowed characters: letters, numbers, underscore."
+            )
+    if if_exists not in {"replace", "append", "fail"}:
+        raise ValueError(f"Unsupported if_exists value: {if_exists!r}")
+
+    # Every identifier is quoted, as ``to_sql`` quotes the tables it creates,
+    # so mixed-case names are not folded to lower case by PostgreSQL.
+    quoted_schema = _quote(schema)
+    target = f"{quoted_schema}.{_quote(table_name)}"
+    staging_name = f"{table_name}__staging"
+    staging = f"{quoted_schema}.{_quote(staging_name)}"
     with engine.begin() as conn:
-        conn.exec_driver_sql(f"CREATE SCHEMA IF NOT EXISTS {schema};")
-    df.to_sql(table_name, engine, schema=schema, if_exists=if_exists, index=False)
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql(f"CREATE SCHEMA IF NOT EXISTS {quoted_schema};")
+        exists = inspect(conn).has_table(table_name, schema=schema)
+        if exists and if_exists == "fail":
+            raise ValueError(f"Table {schema}.{table_name} already exists.")
+
+        if exists and if_exists == "append":
+            if conn.dialect.name == "postgresql":
+                return _copy_into(conn, df, target)
+            df.to_sql(table_name, conn, schema=schema, if_exists="append", index=False)
+            return None
 
+        sent = _bulk_load(conn, df, schema, staging_name)
+        for column in index_columns:
+            index_name = _quote(f"{staging_name}_{column.lower()}_idx")
+            if conn.dialect.name == "postgresql":
+                statement = f"CREATE INDEX {index_name} ON {staging}"
+            else:
+                # SQLite keeps index names across table renames; drop the previous
+                # generation's index (still inside this transaction) before reusing it.
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {quoted_schema}.{index_name};")
+                statement = f"CREATE INDEX {quoted_schema}.{index_name} ON {_quote(staging_name)}"
+            conn.exec_driver_sql(f"{statement} ({_quote(column)});")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {target};")
+        conn.exec_driver_sql(f"ALTER TABLE {staging} RENAME TO {_quote(table_name)};")
+        if conn.dialect.name == "postgresql":
+            for column in index_columns:
+                suffix = f"_{column.lower()}_idx"
+                conn.exec_driver_sql(
+                    f"ALTER INDEX {quoted_schema}.{_quote(staging_name + suffix)} "
+                    f"RENAME TO {_quote(table_name + suffix)};"
+                )
+    return sent
@@ -2,44 +2,117 @@
 
 from __future__ import annotations
 
+import logging
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from sqlalchemy.engine import Engine
 
-from .constants import FEATURE_COLUMNS
+from .constants import FEATURE_COLUMNS, GENRE_LIST_COLUMN
 from .database import normalize_columns, read_table
 
+LOGGER = logging.getLogger(__name__)
+
 LOCAL_CSV_DIR = Path(__file__).resolve().parents[2] / "data" / "CSVs"
 
 
-def _most_frequent(series: pd.Series) -> str:
-    """Return the most common entry, handling ties deterministically."""
-    mode = series.mode()
-    if not mode.empty:
-        return mode.iloc[0]
-    # Fall back to the last observed value if pandas could not compute a mode.
-    return series.iloc[-1]
+def mode_from_counts(counts: pd.DataFrame) -> pd.DataFrame:
+    """Pick each user's most frequent state from ``(usuariosk, estado, n)`` counts.
+
+    Ties go to the smallest state name, which is what ``Series.mode().iloc[0]``
+    returns, and the result is ordered by ``usuariosk`` like a groupby.
+    """
+    ordered = counts.sort_values(
+        ["usuariosk", "n", "estado"], ascending=[True, False, True], kind="stable"
+    )
+    return ordered.drop_duplicates("usuariosk")[["usuariosk", "estado"]].reset_index(
+        drop=True
+    )
+
+
+def modal_state(user_states: pd.DataFrame) -> pd.DataFrame:
+    """Return each user's most frequent ``estado`` without a per-group Python callback."""
+    counts = (
+        user_states.groupby(["usuariosk", "estado"], sort=False, observed=True)
+        .size()
+        .reset_index(name="n")
+    )
+    return mode_from_counts(counts)
+
+
+# Columns each source contributes to the training set, with the dtypes of the
+# compact mode: int32 surrogate keys, float32 numerics and categoricals for the
+# strings repeated on every rating.
+_TRAINING_SOURCES: Dict[str, Dict[str, str]] = {
+    "avaliacao": {
+        "avaliacaosk": "int32",
+        "usuariosk": "int32",
+        "filmesk": "int32",
+        "nota": "float32",
+    },
+    "filme": {
+        "filmesk": "int32",
+        "filmenome": "category",
+        "anodelancamento": "float32",
+        "duracaomin": "float32",
+        "generonome": "category",
+    },
+    "receita": {"usuariosk": "int32", "enderecosk": "int32"},
+    "endereco": {"enderecosk": "int32", "estado": "category"},
+}
+
+
+def training_csv_paths(csv_dir: Path = LOCAL_CSV_DIR) -> List[Path]:
+    """The CSV exports :func:`build_training_dataset` reads."""
+    return [csv_dir / f"{name}.csv" for name in _TRAINING_SOURCES]
+
+
+def _memory_mb(*frames: pd.DataFrame) -> float:
+    return sum(int(frame.memory_usage(deep=True).sum()) for frame in frames) / 2**20
+
+
+def _read_source(
+    engine, name: str, load_from_database: bool, csv_dir: Path, compact: bool
+) -> pd.DataFrame:
+    dtypes = _TRAINING_SOURCES[name]
+    if load_from_database:
+        frame = read_table(engine, f"dw_alv.{name}", list(dtypes))
+        return frame.astype(dtypes) if compact else frame
+    if compact:
+        return pd.read_csv(
+            csv_dir / f"{name}.csv", engine="pyarrow", usecols=list(dtypes), dtype=dtypes
+        )
+    return pd.read_csv(csv_dir / f"{name}.csv")
 
 
 def build_training_dataset(
-    engine, load_from_database: bool = False
+    engine,
+    load_from_database: bool = False,
+    csv_dir: Path = LOCAL_CSV_DIR,
+    compact: bool = False,
 ) -> Tuple[pd.DataFrame, List[str]]:
-    """Assemble the supervised dataset (ratings enriched with metadata)."""
-    if load_from_database:
-        avaliacao = read_table(engine, "dw_alv.avaliacao")
-        filmes = read_table(engine, "dw_alv.filme")
-        receita = read_table(engine, "dw_alv.receita")
-        endereco = read_table(engine, "dw_alv.endereco")
-    else:
-        avaliacao = pd.read_csv(LOCAL_CSV_DIR / "avaliacao.csv")
-        endereco = pd.read_csv(LOCAL_CSV_DIR / "endereco.csv")
-        filmes = pd.read_csv(LOCAL_CSV_DIR / "filme.csv")
-        receita = pd.read_csv(LOCAL_CSV_DIR / "receita.csv")
+    """Assemble the supervised dataset (ratings enriched with metadata).
+
+    ``compact`` reads only the columns used, with the dtypes of
+    :data:`_TRAINING_SOURCES` (CSVs through the Arrow parser), and keeps them
+    through the merges, so ``estado``/``generonome`` stay categorical in the
+    result. The memory held after each stage is logged.
+    """
+    avaliacao, filmes, receita, endereco = (
+        _read_source(engine, name, load_from_database, csv_dir, compact)
+        for name in ("avaliacao", "filme", "receita", "endereco")
+    )
+    LOGGER.info(
+        "Dataset de treino: %.1f MB após a leitura.",
+        _memory_mb(avaliacao, filmes, receita, endereco),
+    )
 
-    filmes_subset = filmes[
-        ["filmesk", "filmenome", "anodelancamento", "duracaomin", "generonome"]
-    ]
+    filmes_subset = filmes[list(_TRAINING_SOURCES["filme"])]
 
     if receita.empty:
         user_state = pd.DataFrame(columns=["usuariosk", "estado"])
@@ -52,54 +125,158 @@ def build_training_dataset(
         if user_state.empty:
             user_state = pd.DataFrame(columns=["usuariosk", "estado"])
         else:
-            user_state = (
-                user_state.groupby("usuariosk")["estado"].agg(_most_frequent).reset_index()
-            )
+            user_state = modal_state(user_state)
+    del receita, endereco
+    LOGGER.info("Dataset de treino: %.1f MB após o estado modal.", _memory_mb(user_state))
 
     training = (
-        avaliacao[["avaliacaosk", "usuariosk", "filmesk", "nota"]]
+        avaliacao[list(_TRAINING_SOURCES["avaliacao"])]
         .merge(filmes_subset, on="filmesk", how="left")
         .merge(user_state, on="usuariosk", how="inner")
     )
+    del avaliacao, filmes, filmes_subset
+    LOGGER.info("Dataset de treino: %.1f MB após as junções.", _memory_mb(training))
+
+    training, states = finalize_training_dataset(training)
+    LOGGER.info(
+        "Dataset de treino: %.1f MB finalizado (%d linhas).", _memory_mb(training), len(training)
+    )
+    return training, states
+
+
+# Ratings joined to their movie and to the rater's modal state. ``COLLATE "C"``
+# makes mode() break ties by code point, the same order pandas' Series.mode uses.
+_TRAINING_QUERY = """
+    WITH user_state AS (
+        SELECT r.usuariosk,
+               mode() WITHIN GROUP (ORDER BY e.estado COLLATE "C") AS estado
+        FROM dw_alv.receita r
+        JOIN dw_alv.endereco e ON e.enderecosk = r.enderecosk
+        GROUP BY r.usuariosk
+    )
+    SELECT a.avaliacaosk, f.anodelancamento, f.duracaomin, f.generonome,
+           us.estado, a.nota
+    FROM dw_alv.avaliacao a
+    JOIN dw_alv.filme f ON f.filmesk = a.filmesk
+    JOIN user_state us ON us.usuariosk = a.usuariosk
+"""
 
+TRAINING_VIEW = "dw_alv.training_dataset"
+
+
+def refresh_training_view(engine: Engine) -> None:
+    """Create the training materialized view if needed and refresh its contents."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"CREATE MATERIALIZED VIEW IF NOT EXISTS {TRAINING_VIEW} AS {_TRAINING_QUERY} "
+            "WITH NO DATA;"
+        )
+        conn.exec_driver_sql(f"REFRESH MATERIALIZED VIEW {TRAINING_VIEW};")
+
+
+def build_training_dataset_in_database(
+    engine: Engine, use_materialized_view: bool = False
+) -> Tuple[pd.DataFrame, List[str]]:
+    """Assemble the training set inside PostgreSQL and fetch only the model columns.
+
+    The joins and the per-user modal state run server side, so only the
+    model's input columns and ``nota`` travel over the network. With
+    ``use_materialized_view`` the query result is read from
+    :data:`TRAINING_VIEW`, which should be refreshed with
+    :func:`refresh_training_view` after each ETL load.
+    """
+    source = TRAINING_VIEW if use_materialized_view else f"({_TRAINING_QUERY}) AS training"
+    # The genre list is derived locally from ``generonome``.
+    columns = [column for column in FEATURE_COLUMNS if column != GENRE_LIST_COLUMN]
+    query = (
+        f"SELECT {', '.join(columns + ['nota'])} FROM {source} "
+        "ORDER BY avaliacaosk;"
+    )
+    training = normalize_columns(pd.read_sql_query(query, engine))
+    return finalize_training_dataset(training)
+
+
+def finalize_training_dataset(training: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """Coerce numeric features, drop incomplete rows and list the states present."""
     for col in ["anodelancamento", "duracaomin", "nota"]:
         training[col] = pd.to_numeric(training[col], errors="coerce")
+    # The DW keeps a single genre per movie, so its genre list is that genre.
+    training[GENRE_LIST_COLUMN] = training["generonome"]
 
     training = training.dropna(subset=FEATURE_COLUMNS + ["nota"])
     states = sorted(training["estado"].unique().tolist())
     return training, states
 
 
+_IMDB_RENAME_MAP = {
+    "tconst": "FilmeIMDbSKRaw",
+    "primarytitle": "FilmeNome",
+    "startyear": "AnoDeLancamento",
+    "runtimeminutes": "DuracaoMin",
+    "genres": "GeneroNome",
+    "averagerating": "IMDbAvaliacao",
+    "numvotes": "IMDbNumVotos",
+}
+
+
+_CANDIDATE_SORT_KEYS = [
+    ("averagerating", "descending"),
+    ("numvotes", "descending"),
+    ("__position", "ascending"),
+]
+
+
+def _candidate_filter() -> ds.Expression:
+    """Quality filters pushed down into the parquet scan (nulls are dropped)."""
+    return (
+        (ds.field("runtimeminutes") > 0)
+        & (ds.field("startyear") > 1900)
+        & (ds.field("numvotes") >= 1000)
+        & (ds.field("averagerating") >= 6.0)
+    )
+
+
+def _candidate_scanner(path: Path, batch_size: Optional[int] = None) -> ds.Scanner:
+    """Build a column-projected, filtered scanner over the IMDb parquet."""
+    dataset = ds.dataset(path, format="parquet")
+    options = {} if batch_size is None else {"batch_size": batch_size}
+    return dataset.scanner(
+        columns=list(_IMDB_RENAME_MAP), filter=_candidate_filter(), **options
+    )
+
+
+def _to_candidate_frame(table: pa.Table) -> pd.DataFrame:
+    """Keep the genre list, add its leading genre and convert to the pipeline's names."""
+    # The raw file stores genres as "genre1,genre2". The full list feeds the
+    # multi-hot features; the leading genre keeps the existing output schema.
+    genres = pc.fill_null(table["genres"], "desconhecido")
+    primary = pc.utf8_trim_whitespace(
+        pc.list_element(pc.split_pattern(genres, ",", max_splits=1), 0)
+    )
+    table = table.set_column(table.schema.get_field_index("genres"), "genres", primary)
+    table = table.append_column(GENRE_LIST_COLUMN, genres)
+    return normalize_columns(table.to_pandas().rename(columns=_IMDB_RENAME_MAP))
+
+
 def prepare_candidate_movies(path: Path, limit: int) -> pd.DataFrame:
-    """Load/clean the IMDb metadata that feeds the inference step."""
-    df_imdb = pd.read_parquet(path)
-    rename_map = {
-        "tconst": "FilmeIMDbSKRaw",
-        "primarytitle": "FilmeNome",
-        "startyear": "AnoDeLancamento",
-        "runtimeminutes": "DuracaoMin",
-        "genres": "GeneroNome",
-        "averagerating": "IMDbAvaliacao",
-        "numvotes": "IMDbNumVotos",
-    }
-    df = normalize_columns(df_imdb.rename(columns=rename_map))
-
-    numeric_cols = ["anodelancamento", "duracaomin", "imdbavaliacao", "imdbnumvotos"]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    def pick_primary_genre(value) -> str:
-        # The raw file stores genres as "genre1,genre2". We keep the leading genre
-        # to maintain compatibility with the existing schema while still capturing
-        # the user's dominant preference.
-        if isinstance(value, str):
-            return value.split(",")[0].strip()
-        return "desconhecido"
-
-    df["generonome"] = df["generonome"].fillna("desconhecido").apply(pick_primary_genre)
-
-    df = df.dropna(subset=numeric_cols)
-    df = df[(df["duracaomin"] > 0) & (df["anodelancamento"] > 1900)]
-    df = df[(df["imdbnumvotos"] >= 1000) & (df["imdbavaliacao"] >= 6.0)]
-    df = df.sort_values(["imdbavaliacao", "imdbnumvotos"], ascending=[False, False])
-    return df.head(limit)
+    """Load/clean the IMDb metadata that feeds the inference step.
+
+    Only the mapped columns are read and the quality filters are evaluated
+    during the scan, so row groups whose statistics fail them are skipped. The
+    best ``limit`` titles are picked with a top-k selection instead of a sort.
+    """
+    table = _candidate_scanner(path).to_table()
+    table = table.append_column("__position", pa.array(np.arange(table.num_rows)))
+    top = pc.select_k_unstable(table, k=limit, sort_keys=_CANDIDATE_SORT_KEYS)
+    return _to_candidate_frame(table.take(top).drop_columns(["__position"]))
+
+
+def iter_candidate_movies(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Yield the cleaned IMDb catalog in chunks of at most ``chunk_size`` rows.
+
+    Unlike :func:`prepare_candidate_movies` there is no cap or global sort: the
+    whole filtered catalog is streamed, keeping memory bounded by the chunk size.
+    """
+    for batch in _candidate_scanner(path, batch_size=chunk_size).to_batches():
+        if batch.num_rows:
+            yield _to_candidate_frame(pa.Table.from_batches([batch]))
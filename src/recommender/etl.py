@@ -0,0 +1,516 @@
+"""Incremental load of the DW (``dw_alv``) from the operational schema (``oper_alv``).
+
+Replaces replaying ``ETL_init_load_ALV.sql`` + ``ETL_new_fact_ALV.sql`` on an
+empty warehouse. Each source table has a high-watermark on its operational id
+in ``dw_alv.etl_watermark``; a run only reads ids in ``(watermark, high]``,
+where ``high`` is captured in one snapshot at the start, and merges them with
+``INSERT ... ON CONFLICT``. Surrogate keys are assigned once and never
+renumbered: movies and producers through the ``map_filme``/``map_produtora``
+lookup tables (the DW does not keep their operational ids), users, states and
+dates through unique indexes on their natural keys in the dimensions
+themselves.
+
+The target is the shape left by ``ETL_new_fact_ALV.sql``: one ``endereco`` row
+per state, and ``enderecosk`` on ``avaliacao``. Dimension rows are only
+revisited inside their id window; use ``full=True`` to re-merge every row
+(e.g. after editing the genres of existing movies).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+LOGGER = logging.getLogger(__name__)
+
+UNKNOWN_GENRE = "Gênero Desconhecido"
+UNKNOWN_PRODUCER = "Produtora Desconhecida"
+
+# Watermarked sources and the operational id each one advances on.
+_SOURCES = {
+    "usuario": ("oper_alv.usuario", "usuarioid"),
+    "endereco": ("oper_alv.usuario", "usuarioid"),
+    "filme": ("oper_alv.filme", "filmeid"),
+    "produtora": ("oper_alv.produtora", "produtoraid"),
+    "avaliacao": ("oper_alv.avaliacao", "avaliacaoid"),
+    "receita": ("oper_alv.usrpagto", "usrpagtoid"),
+}
+
+_LOCK_SQL = text("SELECT pg_try_advisory_lock(hashtext('dw_alv.etl'))")
+_UNLOCK_SQL = text("SELECT pg_advisory_unlock(hashtext('dw_alv.etl'))")
+
+_SETUP_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS dw_alv.etl_watermark (
+        fonte varchar(64) PRIMARY KEY,
+        valor bigint NOT NULL,
+        atualizado_em timestamptz NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dw_alv.map_filme (
+        filmeid int PRIMARY KEY,
+        filmesk int NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dw_alv.map_produtora (
+        produtoraid int PRIMARY KEY,
+        produtorask int NOT NULL UNIQUE
+    )
+    """,
+    # Same shape changes as ETL_new_fact_ALV.sql.
+    "ALTER TABLE dw_alv.avaliacao ADD COLUMN IF NOT EXISTS enderecosk int",
+    """
+    ALTER TABLE dw_alv.endereco
+        DROP COLUMN IF EXISTS bairro,
+        DROP COLUMN IF EXISTS logradouro,
+        DROP COLUMN IF EXISTS municipio
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS usuario_email_telefone_key ON dw_alv.usuario (email, telefone)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS endereco_estado_key ON dw_alv.endereco (estado)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS calendario_datacompleta_key ON dw_alv.calendario (datacompleta)",
+    # A warehouse built by the SQL scripts numbered movies and producers with
+    # ROW_NUMBER() over their ids; rebuild that mapping once for the rows it has.
+    """
+    INSERT INTO dw_alv.map_filme (filmeid, filmesk)
+    SELECT filmeid, filmesk
+    FROM (SELECT filmeid, ROW_NUMBER() OVER (ORDER BY filmeid) AS filmesk FROM oper_alv.filme) m
+    WHERE NOT EXISTS (SELECT 1 FROM dw_alv.map_filme)
+      AND m.filmesk <= (SELECT COALESCE(MAX(filmesk), 0) FROM dw_alv.filme)
+    """,
+    """
+    INSERT INTO dw_alv.map_produtora (produtoraid, produtorask)
+    SELECT produtoraid, produtorask
+    FROM (
+        SELECT produtoraid, ROW_NUMBER() OVER (ORDER BY produtoraid) AS produtorask
+        FROM oper_alv.produtora
+    ) m
+    WHERE NOT EXISTS (SELECT 1 FROM dw_alv.map_produtora)
+      AND m.produtorask <= (
+          SELECT COUNT(*) FROM dw_alv.produtora WHERE produtoranome <> :desconhecida
+      )
+    """,
+    # Facts already loaded by the scripts keep their operational id as key.
+    """
+    INSERT INTO dw_alv.etl_watermark (fonte, valor)
+    SELECT 'avaliacao', MAX(avaliacaosk) FROM dw_alv.avaliacao HAVING COUNT(*) > 0
+    ON CONFLICT (fonte) DO NOTHING
+    """,
+    """
+    INSERT INTO dw_alv.etl_watermark (fonte, valor)
+    SELECT 'receita', MAX(receitask) FROM dw_alv.receita HAVING COUNT(*) > 0
+    ON CONFLICT (fonte) DO NOTHING
+    """,
+]
+
+_USUARIO_SQL = text(
+    """
+    INSERT INTO dw_alv.usuario (usuariosk, email, telefone)
+    SELECT (SELECT COALESCE(MAX(usuariosk), 0) FROM dw_alv.usuario)
+               + ROW_NUMBER() OVER (ORDER BY email, telefone),
+           email, telefone
+    FROM (
+        SELECT DISTINCT u.email, u.telefone
+        FROM oper_alv.usuario u
+        WHERE u.usuarioid > :low AND u.usuarioid <= :high
+          AND NOT EXISTS (
+              SELECT 1 FROM dw_alv.usuario d
+              WHERE d.email = u.email AND d.telefone = u.telefone
+          )
+    ) novos
+    ON CONFLICT (email, telefone) DO NOTHING
+    """
+)
+
+_ENDERECO_SQL = text(
+    """
+    INSERT INTO dw_alv.endereco (enderecosk, estado)
+    SELECT (SELECT COALESCE(MAX(enderecosk), 0) FROM dw_alv.endereco)
+               + ROW_NUMBER() OVER (ORDER BY estado),
+           estado
+    FROM (
+        SELECT DISTINCT u.estado
+        FROM oper_alv.usuario u
+        WHERE u.usuarioid > :low AND u.usuarioid <= :high
+          AND NOT EXISTS (SELECT 1 FROM dw_alv.endereco e WHERE e.estado = u.estado)
+    ) novos
+    ON CONFLICT (estado) DO NOTHING
+    """
+)
+
+_MAP_FILME_SQL = text(
+    """
+    INSERT INTO dw_alv.map_filme (filmeid, filmesk)
+    SELECT f.filmeid,
+           (SELECT COALESCE(MAX(filmesk), 0) FROM dw_alv.map_filme)
+               + ROW_NUMBER() OVER (ORDER BY f.filmeid)
+    FROM oper_alv.filme f
+    WHERE f.filmeid > :low AND f.filmeid <= :high
+      AND NOT EXISTS (SELECT 1 FROM dw_alv.map_filme m WHERE m.filmeid = f.filmeid)
+    ON CONFLICT (filmeid) DO NOTHING
+    """
+)
+
+_FILME_SQL = text(
+    """
+    INSERT INTO dw_alv.filme (filmesk, duracaomin, filmenome, anodelancamento, generonome)
+    SELECT m.filmesk, f.duracaomin, f.filmenome, f.anode_lancamento,
+           COALESCE(g.generofilme, :desconhecido)
+    FROM oper_alv.filme f
+    JOIN dw_alv.map_filme m ON m.filmeid = f.filmeid
+    LEFT JOIN (
+        SELECT filmeid, MIN(generofilme) AS generofilme
+        FROM oper_alv.filme_generofilme
+        WHERE filmeid > :low AND filmeid <= :high
+        GROUP BY filmeid
+    ) g ON g.filmeid = f.filmeid
+    WHERE f.filmeid > :low AND f.filmeid <= :high
+    ON CONFLICT (filmesk) DO UPDATE SET
+        duracaomin = EXCLUDED.duracaomin,
+        filmenome = EXCLUDED.filmenome,
+        anodelancamento = EXCLUDED.anodelancamento,
+        generonome = EXCLUDED.generonome
+    WHERE (dw_alv.filme.duracaomin, dw_alv.filme.filmenome,
+           dw_alv.filme.anodelancamento, dw_alv.filme.generonome)
+          IS DISTINCT FROM
+          (EXCLUDED.duracaomin, EXCLUDED.filmenome,
+           EXCLUDED.anodelancamento, EXCLUDED.generonome)
+    """
+)
+
+# The unknown producer has no operational id, so it only lives in the dimension
+# and new keys are taken above the dimension's maximum. Ratings of movies
+# without royalty payments point to it.
+_MAP_PRODUTORA_SQL = text(
+    """
+    INSERT INTO dw_alv.map_produtora (produtoraid, produtorask)
+    SELECT p.produtoraid,
+           GREATEST(
+               (SELECT COALESCE(MAX(produtorask), 0) FROM dw_alv.produtora),
+               (SELECT COALESCE(MAX(produtorask), 0) FROM dw_alv.map_produtora)
+           ) + ROW_NUMBER() OVER (ORDER BY p.produtoraid)
+    FROM oper_alv.produtora p
+    WHERE p.produtoraid > :low AND p.produtoraid <= :high
+      AND NOT EXISTS (SELECT 1 FROM dw_alv.map_produtora m WHERE m.produtoraid = p.produtoraid)
+    ON CONFLICT (produtoraid) DO NOTHING
+    """
+)
+
+_PRODUTORA_SQL = text(
+    """
+    INSERT INTO dw_alv.produtora (produtorask, produtoranome)
+    SELECT m.produtorask, p.produtoranome
+    FROM oper_alv.produtora p
+    JOIN dw_alv.map_produtora m ON m.produtoraid = p.produtoraid
+    WHERE p.produtoraid > :low AND p.produtoraid <= :high
+    ON CONFLICT (produtorask) DO UPDATE SET produtoranome = EXCLUDED.produtoranome
+    WHERE dw_alv.produtora.produtoranome IS DISTINCT FROM EXCLUDED.produtoranome
+    """
+)
+
+_UNKNOWN_PRODUTORA_SQL = text(
+    """
+    INSERT INTO dw_alv.produtora (produtorask, produtoranome)
+    SELECT GREATEST(
+               (SELECT COALESCE(MAX(produtorask), 0) FROM dw_alv.produtora),
+               (SELECT COALESCE(MAX(produtorask), 0) FROM dw_alv.map_produtora)
+           ) + 1,
+           :desconhecida
+    WHERE NOT EXISTS (SELECT 1 FROM dw_alv.produtora WHERE produtoranome = :desconhecida)
+    """
+)
+
+# Dates of the new facts (and today, as ETL_new_fact_ALV.sql adds it) widen the
+# calendar's range; every missing day of that range is added.
+_CALENDARIO_SQL = text(
+    """
+    WITH datas AS (
+        SELECT avaliacaodata AS d FROM oper_alv.avaliacao
+        WHERE avaliacaoid > :avaliacao_low AND avaliacaoid <= :avaliacao_high
+        UNION
+        SELECT datapagto FROM oper_alv.usrpagto
+        WHERE usrpagtoid > :receita_low AND usrpagtoid <= :receita_high
+        UNION
+        SELECT CURRENT_DATE
+        UNION
+        SELECT datacompleta FROM (
+            SELECT MIN(datacompleta) AS datacompleta FROM dw_alv.calendario
+            UNION ALL
+            SELECT MAX(datacompleta) FROM dw_alv.calendario
+        ) limites
+        WHERE datacompleta IS NOT NULL
+    ),
+    faltantes AS (
+        SELECT s.d::date AS d
+        FROM generate_series(
+            (SELECT MIN(d) FROM datas), (SELECT MAX(d) FROM datas), interval '1 day'
+        ) AS s(d)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM dw_alv.calendario c WHERE c.datacompleta = s.d::date
+        )
+    )
+    INSERT INTO dw_alv.calendario (calendariosk, datacompleta, diasemana, dia, mes, trimestre, ano)
+    SELECT (SELECT COALESCE(MAX(calendariosk), 0) FROM dw_alv.calendario)
+               + ROW_NUMBER() OVER (ORDER BY d),
+           d, TO_CHAR(d, 'Dy'),
+           EXTRACT(DAY FROM d)::int, EXTRACT(MONTH FROM d)::int,
+           EXTRACT(QUARTER FROM d)::int, EXTRACT(YEAR FROM d)::int
+    FROM faltantes
+    ON CONFLICT (datacompleta) DO NOTHING
+    """
+)
+
+# Fact windows are staged and analyzed first: ids past the source's last
+# ANALYZE are badly underestimated, which turns the joins into nested loops.
+_STAGE_AVALIACAO_SQL = text(
+    """
+    CREATE TEMP TABLE novas ON COMMIT DROP AS
+    SELECT * FROM oper_alv.avaliacao WHERE avaliacaoid > :low AND avaliacaoid <= :high
+    """
+)
+
+_STAGE_RECEITA_SQL = text(
+    """
+    CREATE TEMP TABLE novos ON COMMIT DROP AS
+    SELECT * FROM oper_alv.usrpagto WHERE usrpagtoid > :low AND usrpagtoid <= :high
+    """
+)
+
+_AVALIACAO_SQL = text(
+    """
+    WITH produtora_filme AS (
+        SELECT filmeid, (ARRAY_AGG(produtoraid ORDER BY datapagto DESC))[1] AS produtoraid
+        FROM oper_alv.filmpagtoroy
+        WHERE filmeid IN (SELECT filmeid FROM novas)
+        GROUP BY filmeid
+    )
+    INSERT INTO dw_alv.avaliacao
+        (avaliacaosk, nota, usuariosk, filmesk, produtorask, calendariosk, enderecosk)
+    SELECT a.avaliacaoid, a.nota, du.usuariosk, mf.filmesk,
+           COALESCE(mp.produtorask, desconhecida.produtorask), c.calendariosk, e.enderecosk
+    FROM novas a
+    JOIN oper_alv.usuario u ON u.usuarioid = a.usuarioid
+    JOIN dw_alv.usuario du ON du.email = u.email AND du.telefone = u.telefone
+    JOIN dw_alv.map_filme mf ON mf.filmeid = a.filmeid
+    LEFT JOIN produtora_filme pf ON pf.filmeid = a.filmeid
+    LEFT JOIN dw_alv.map_produtora mp ON mp.produtoraid = pf.produtoraid
+    CROSS JOIN (
+        SELECT produtorask FROM dw_alv.produtora WHERE produtoranome = :desconhecida LIMIT 1
+    ) desconhecida
+    JOIN dw_alv.calendario c ON c.datacompleta = a.avaliacaodata
+    JOIN dw_alv.endereco e ON e.estado = u.estado
+    ON CONFLICT (avaliacaosk) DO UPDATE SET
+        nota = EXCLUDED.nota,
+        usuariosk = EXCLUDED.usuariosk,
+        filmesk = EXCLUDED.filmesk,
+        produtorask = EXCLUDED.produtorask,
+        calendariosk = EXCLUDED.calendariosk,
+        enderecosk = EXCLUDED.enderecosk
+    """
+)
+
+_RECEITA_SQL = text(
+    """
+    INSERT INTO dw_alv.receita (receitask, valorpago, usuariosk, calendariosk, enderecosk)
+    SELECT p.usrpagtoid, p.valorpago, du.usuariosk, c.calendariosk, e.enderecosk
+    FROM novos p
+    JOIN oper_alv.usuario u ON u.usuarioid = p.usuarioid
+    JOIN dw_alv.usuario du ON du.email = u.email AND du.telefone = u.telefone
+    JOIN dw_alv.calendario c ON c.datacompleta = p.datapagto
+    JOIN dw_alv.endereco e ON e.estado = u.estado
+    ON CONFLICT (receitask) DO UPDATE SET
+        valorpago = EXCLUDED.valorpago,
+        usuariosk = EXCLUDED.usuariosk,
+        calendariosk = EXCLUDED.calendariosk,
+        enderecosk = EXCLUDED.enderecosk
+    """
+)
+
+# Freshly merged dimensions have no planner statistics yet; without them the
+# fact merges fall back to nested loops over every new fact row.
+_ANALYZE_DIMENSIONS_SQL = (
+    "ANALYZE dw_alv.usuario, dw_alv.endereco, dw_alv.filme, dw_alv.map_filme, "
+    "dw_alv.produtora, dw_alv.map_produtora, dw_alv.calendario"
+)
+
+_SET_WATERMARK_SQL = text(
+    """
+    INSERT INTO dw_alv.etl_watermark (fonte, valor) VALUES (:fonte, :valor)
+    ON CONFLICT (fonte) DO UPDATE SET valor = EXCLUDED.valor, atualizado_em = now()
+    """
+)
+
+
+@dataclass
+class EtlStepStats:
+    """Rows merged and time spent by one ETL step."""
+
+    step: str
+    rows: int = 0
+    seconds: float = 0.0
+
+
+def ensure_etl_tables(engine: Engine) -> None:
+    """Create the watermark/lookup tables and natural-key indexes (idempotent)."""
+    with engine.begin() as conn:
+        for statement in _SETUP_SQL:
+            conn.execute(text(statement), {"desconhecida": UNKNOWN_PRODUCER})
+
+
+def _windows(conn: Connection, full: bool) -> Dict[str, Dict[str, int]]:
+    """Return the ``(low, high]`` id window of every source, read in one snapshot."""
+    stored = dict(conn.execute(text("SELECT fonte, valor FROM dw_alv.etl_watermark")).all())
+    windows = {}
+    for source, (table, column) in _SOURCES.items():
+        high = conn.execute(text(f"SELECT COALESCE(MAX({column}), -1) FROM {table}")).scalar()
+        low = -1 if full else stored.get(source, -1)
+        windows[source] = {"low": int(low), "high": int(high)}
+    return windows
+
+
+def _merge_usuario(conn: Connection, window: Dict[str, int]) -> int:
+    return conn.execute(_USUARIO_SQL, window).rowcount
+
+
+def _merge_endereco(conn: Connection, window: Dict[str, int]) -> int:
+    return conn.execute(_ENDERECO_SQL, window).rowcount
+
+
+def _merge_filme(conn: Connection, window: Dict[str, int]) -> int:
+    conn.execute(_MAP_FILME_SQL, window)
+    return conn.execute(_FILME_SQL, {**window, "desconhecido": UNKNOWN_GENRE}).rowcount
+
+
+def _merge_produtora(conn: Connection, window: Dict[str, int]) -> int:
+    conn.execute(_MAP_PRODUTORA_SQL, window)
+    return conn.execute(_PRODUTORA_SQL, window).rowcount
+
+
+def _check_merged(conn: Connection, step: str, staged: str, merged: int) -> int:
+    """Fail the step if some staged fact rows found no dimension row to join."""
+    expected = conn.execute(text(f"SELECT count(*) FROM {staged}")).scalar()
+    if merged != expected:
+        raise RuntimeError(
+            f"{step}: {expected - merged} de {expected} linhas sem correspondência "
+            "nas dimensões do DW; a marca d'água não foi avançada."
+        )
+    return merged
+
+
+def _merge_avaliacao(conn: Connection, window: Dict[str, int]) -> int:
+    # The producer step is skipped when no producer is new, so the fallback row
+    # the facts join to is created here.
+    conn.execute(_UNKNOWN_PRODUTORA_SQL, {"desconhecida": UNKNOWN_PRODUCER})
+    conn.execute(_STAGE_AVALIACAO_SQL, window)
+    conn.exec_driver_sql("ANALYZE novas")
+    merged = conn.execute(_AVALIACAO_SQL, {"desconhecida": UNKNOWN_PRODUCER}).rowcount
+    return _check_merged(conn, "avaliacao", "novas", merged)
+
+
+def _merge_receita(conn: Connection, window: Dict[str, int]) -> int:
+    conn.execute(_STAGE_RECEITA_SQL, window)
+    conn.exec_driver_sql("ANALYZE novos")
+    return _check_merged(conn, "receita", "novos", conn.execute(_RECEITA_SQL).rowcount)
+
+
+_DIMENSIONS: Dict[str, Callable[[Connection, Dict[str, int]], int]] = {
+    "usuario": _merge_usuario,
+    "endereco": _merge_endereco,
+    "filme": _merge_filme,
+    "produtora": _merge_produtora,
+}
+_FACTS: Dict[str, Callable[[Connection, Dict[str, int]], int]] = {
+    "avaliacao": _merge_avaliacao,
+    "receita": _merge_receita,
+}
+
+
+def _run_step(
+    engine: Engine,
+    step: str,
+    merge: Callable[[Connection, Dict[str, int]], int],
+    window: Dict[str, int],
+) -> EtlStepStats:
+    """Merge one source window and advance its watermark in the same transaction."""
+    stats = EtlStepStats(step)
+    start = time.perf_counter()
+    if window["high"] > window["low"]:
+        with engine.begin() as conn:
+            stats.rows = merge(conn, window)
+            conn.execute(_SET_WATERMARK_SQL, {"fonte": step, "valor": window["high"]})
+    stats.seconds = time.perf_counter() - start
+    LOGGER.info(
+        "%s: ids (%d, %d], %d linhas em %.2fs",
+        step,
+        window["low"],
+        window["high"],
+        stats.rows,
+        stats.seconds,
+    )
+    return stats
+
+
+def _merge_calendario(engine: Engine, windows: Dict[str, Dict[str, int]]) -> EtlStepStats:
+    stats = EtlStepStats("calendario")
+    start = time.perf_counter()
+    params = {
+        f"{fact}_{bound}": windows[fact][bound]
+        for fact in _FACTS
+        for bound in ("low", "high")
+    }
+    with engine.begin() as conn:
+        stats.rows = conn.execute(_CALENDARIO_SQL, params).rowcount
+    stats.seconds = time.perf_counter() - start
+    LOGGER.info("calendario: %d datas novas em %.2fs", stats.rows, stats.seconds)
+    return stats
+
+
+def run_incremental_etl(
+    engine: Engine, *, full: bool = False, max_workers: int = 4
+) -> List[EtlStepStats]:
+    """Bring ``dw_alv`` up to date with ``oper_alv`` and return per-step stats.
+
+    Dimensions (and the calendar) are merged concurrently, each in its own
+    transaction, then the two fact tables, also concurrently. A failed step
+    leaves its watermark untouched, so the next run retries exactly that
+    window; a fact step fails if any row of its window finds no user, movie,
+    date or state in the DW. An advisory lock keeps two runs from overlapping.
+    ``engine`` should allow ``max_workers + 1`` connections.
+    """
+    ensure_etl_tables(engine)
+    with engine.connect() as lock_conn:
+        if not lock_conn.execute(_LOCK_SQL).scalar():
+            raise RuntimeError("Outra execução do ETL incremental está em andamento.")
+        try:
+            with engine.connect() as conn:
+                conn.exec_driver_sql("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                windows = _windows(conn, full)
+                conn.rollback()
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = [
+                    pool.submit(_run_step, engine, step, merge, windows[step])
+                    for step, merge in _DIMENSIONS.items()
+                ]
+                futures.append(pool.submit(_merge_calendario, engine, windows))
+                stats = [future.result() for future in futures]
+                if any(s.rows for s in stats):
+                    with engine.begin() as conn:
+                        conn.exec_driver_sql(_ANALYZE_DIMENSIONS_SQL)
+
+                futures = [
+                    pool.submit(_run_step, engine, step, merge, windows[step])
+                    for step, merge in _FACTS.items()
+                ]
+                stats += [future.result() for future in futures]
+        finally:
+            lock_conn.execute(_UNLOCK_SQL)
+            lock_conn.commit()
+    return stats
@@ -0,0 +1,277 @@
+"""Concurrent, streaming export of DW tables to Excel, Parquet or CSV."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from sqlalchemy import inspect, types
+from sqlalchemy.engine import Engine
+from tqdm import tqdm
+
+from .config import EXPORT_FORMATS
+from .database import READ_CHUNK_ROWS, iter_table
+
+LOGGER = logging.getLogger(__name__)
+
+DW_TABLES = [
+    "Usuario",
+    "Filme",
+    "Endereco",
+    "Calendario",
+    "Produtora",
+    "Avaliacao",
+    "Receita",
+    "ModelPrediction",
+]
+
+_DONE = object()
+
+
+@dataclass
+class TableExportStats:
+    """Rows, bytes and timing collected while exporting one table."""
+
+    table: str
+    rows: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class _ExcelSink:
+    """One sheet per table in a write-only (streaming) openpyxl workbook."""
+
+    def __init__(self, output: Path) -> None:
+        self._output = output
+        self._workbook = Workbook(write_only=True)
+        self._sheets: Dict[str, object] = {}
+
+    def write(self, table: str, chunk: pd.DataFrame) -> None:
+        sheet = self._sheets.get(table)
+        if sheet is None:
+            sheet = self._sheets[table] = self._workbook.create_sheet(title=table)
+            sheet.append(list(chunk.columns))
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append([None if pd.isna(value) else value for value in row])
+
+    def close(self) -> None:
+        self._output.parent.mkdir(parents=True, exist_ok=True)
+        self._workbook.save(self._output)
+
+    def abort(self) -> None:
+        # Nothing reaches ``output`` before close(); each streamed sheet lives in
+        # an openpyxl temporary file, otherwise only removed at interpreter exit.
+        for sheet in self._sheets.values():
+            sheet.close()
+            sheet._writer.cleanup()
+
+
+def _arrow_type(column_type: types.TypeEngine) -> Optional[pa.DataType]:
+    """Arrow type for a reflected SQL column type (``None`` when unknown)."""
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, types.Numeric):
+        return pa.float64()
+    if isinstance(column_type, types.String):
+        return pa.string()
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, types.Date):
+        return pa.date32()
+    if isinstance(column_type, types.Boolean):
+        return pa.bool_()
+    return None
+
+
+def _column_types(
+    engine: Engine, schema: str, tables: Sequence[str]
+) -> Dict[str, Dict[str, pa.DataType]]:
+    """Reflect each table's column types, keyed by the lower-cased names ``iter_table`` yields."""
+    inspector = inspect(engine)
+    column_types = {}
+    for table in tables:
+        columns = inspector.get_columns(table.lower(), schema=schema)
+        column_types[table] = {
+            column["name"].lower(): arrow_type
+            for column in columns
+            if (arrow_type := _arrow_type(column["type"])) is not None
+        }
+    return column_types
+
+
+class _ParquetSink:
+    """One Parquet file per table, appended chunk by chunk.
+
+    The file schema comes from the table's reflected column types, so a column
+    that is entirely NULL in the first chunk keeps its real type; only columns
+    of unknown SQL types are inferred from that chunk.
+    """
+
+    def __init__(
+        self, output: Path, column_types: Optional[Dict[str, Dict[str, pa.DataType]]] = None
+    ) -> None:
+        self._output = output
+        self._column_types = column_types or {}
+        self._writers: Dict[str, pq.ParquetWriter] = {}
+
+    def write(self, table: str, chunk: pd.DataFrame) -> None:
+        writer = self._writers.get(table)
+        if writer is None:
+            self._output.mkdir(parents=True, exist_ok=True)
+            known = self._column_types.get(table, {})
+            inferred = pa.Schema.from_pandas(chunk, preserve_index=False)
+            schema = pa.schema(
+                [pa.field(field.name, known.get(field.name, field.type)) for field in inferred]
+            )
+            arrow_table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            writer = self._writers[table] = pq.ParquetWriter(
+                self._output / f"{table.lower()}.parquet", schema
+            )
+        else:
+            arrow_table = pa.Table.from_pandas(
+                chunk, schema=writer.schema, preserve_index=False
+            )
+        writer.write_table(arrow_table)
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+
+    def abort(self) -> None:
+        for table, writer in self._writers.items():
+            writer.close()
+            (self._output / f"{table.lower()}.parquet").unlink(missing_ok=True)
+
+
+class _CsvSink:
+    """One CSV file per table, header written with the first chunk."""
+
+    def __init__(self, output: Path) -> None:
+        self._output = output
+        self._started: set = set()
+
+    def write(self, table: str, chunk: pd.DataFrame) -> None:
+        self._output.mkdir(parents=True, exist_ok=True)
+        first = table not in self._started
+        self._started.add(table)
+        chunk.to_csv(
+            self._output / f"{table.lower()}.csv",
+            mode="w" if first else "a",
+            header=first,
+            index=False,
+        )
+
+    def close(self) -> None:
+        pass
+
+    def abort(self) -> None:
+        for table in self._started:
+            (self._output / f"{table.lower()}.csv").unlink(missing_ok=True)
+
+
+_SINKS = {"xlsx": _ExcelSink, "parquet": _ParquetSink, "csv": _CsvSink}
+
+
+def _log_table(stats: TableExportStats) -> None:
+    LOGGER.info(
+        "%s: %d linhas, %.1f MB em %.2fs (%.0f linhas/s)",
+        stats.table,
+        stats.rows,
+        stats.bytes / 1e6,
+        stats.seconds,
+        stats.rows_per_second,
+    )
+
+
+def export_tables(
+    engine: Engine,
+    output: Path,
+    *,
+    fmt: str = "xlsx",
+    tables: Sequence[str] = DW_TABLES,
+    schema: str = "dw_alv",
+    max_workers: int = 4,
+    chunksize: int = READ_CHUNK_ROWS,
+) -> List[TableExportStats]:
+    """Read ``tables`` concurrently and stream them to ``output``.
+
+    Each table is read by a worker thread through its own pooled connection and
+    server-side cursor; chunks go through a bounded queue to a single writer,
+    so memory stays around ``2 * max_workers`` chunks regardless of table size.
+    ``output`` is the workbook path for ``xlsx`` and a directory otherwise.
+    If a table fails, the reader's exception is raised and the files written
+    so far are removed.
+    """
+    if fmt not in _SINKS:
+        raise ValueError(f"Formato inválido {fmt!r}; use um de {EXPORT_FORMATS}.")
+
+    chunks: "queue.Queue" = queue.Queue(maxsize=2 * max_workers)
+    stats = {table: TableExportStats(table) for table in tables}
+
+    cancelled = threading.Event()
+    errors: Dict[str, BaseException] = {}
+
+    def read(table: str) -> None:
+        start = time.perf_counter()
+        try:
+            for chunk in iter_table(
+                engine, f"{schema}.{table}", chunksize=chunksize, compact=False
+            ):
+                if cancelled.is_set():
+                    return
+                chunks.put((table, chunk))
+        except BaseException as exc:
+            errors[table] = exc
+        finally:
+            stats[table].seconds = time.perf_counter() - start
+            chunks.put((table, _DONE))
+
+    if fmt == "parquet":
+        sink = _ParquetSink(output, _column_types(engine, schema, tables))
+    else:
+        sink = _SINKS[fmt](output)
+    pending = set(tables)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, tqdm(
+        desc=f"Exportando tabelas ({fmt})", unit="rows"
+    ) as progress:
+        for table in tables:
+            pool.submit(read, table)
+        try:
+            while pending:
+                table, chunk = chunks.get()
+                if chunk is _DONE:
+                    pending.discard(table)
+                    if table in errors:
+                        raise errors[table]
+                    _log_table(stats[table])
+                    continue
+                sink.write(table, chunk)
+                stats[table].rows += len(chunk)
+                stats[table].bytes += int(chunk.memory_usage(deep=True).sum())
+                progress.update(len(chunk))
+                progress.set_postfix(tabela=table)
+            sink.close()
+        except BaseException:
+            # Unblock readers waiting on a full queue so the pool can shut down.
+            cancelled.set()
+            while pending:
+                table, chunk = chunks.get()
+                if chunk is _DONE:
+                    pending.discard(table)
+            sink.abort()
+            raise
+    return [stats[table] for table in tables]
@@ -0,0 +1,132 @@
+"""Per-stage runtime metrics and optional profiling for pipeline runs."""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import logging
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+_PROC_STATUS = Path("/proc/self/status")
+_PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+@dataclass
+class StageMetrics:
+    """What one pipeline stage consumed and produced."""
+
+    stage: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    tracemalloc_peak_mb: Optional[float] = None
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    # Bytes actually read from / sent to files or the database, when known.
+    bytes_read: Optional[int] = None
+    bytes_written: Optional[int] = None
+    # In-memory (``memory_usage(deep=True)``) size of the frames the stage handled.
+    frame_bytes: Optional[int] = None
+    profile_path: Optional[str] = None
+    cache: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's high-water mark so the next reading is per stage (Linux only)."""
+    try:
+        _PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb(per_stage: bool) -> float:
+    if per_stage:
+        for line in _PROC_STATUS.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    # Fallback: process-lifetime peak, in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RunMetrics:
+    """Collect :class:`StageMetrics` for every stage of a run.
+
+    ``trace_memory`` adds the tracemalloc peak (Python-level allocations, with
+    some overhead). Stages listed in ``profile_stages`` run under cProfile and
+    their stats are dumped to ``profile_dir/<stage>.prof``.
+    """
+
+    def __init__(
+        self,
+        *,
+        trace_memory: bool = False,
+        profile_stages: Optional[List[str]] = None,
+        profile_dir: Path = Path("reports"),
+    ) -> None:
+        self.trace_memory = trace_memory
+        self.profile_stages = set(profile_stages or [])
+        self.profile_dir = profile_dir
+        self.stages: List[StageMetrics] = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None) -> Iterator[StageMetrics]:
+        """Measure the enclosed block; the caller fills row and byte counts.
+
+        A stage that raises is still recorded, with the exception in ``error``.
+        """
+        record = StageMetrics(stage=name, rows_in=rows_in)
+        per_stage_rss = _reset_peak_rss()
+        profiler = cProfile.Profile() if name in self.profile_stages else None
+        if self.trace_memory:
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        except BaseException as exc:
+            record.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record.wall_s = round(time.perf_counter() - wall, 4)
+            record.cpu_s = round(time.process_time() - cpu, 4)
+            record.peak_rss_mb = round(_peak_rss_mb(per_stage_rss), 2)
+            if self.trace_memory:
+                record.tracemalloc_peak_mb = round(
+                    tracemalloc.get_traced_memory()[1] / 2**20, 2
+                )
+                tracemalloc.stop()
+            if profiler is not None:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                path = self.profile_dir / f"{name}.prof"
+                profiler.dump_stats(path)
+                record.profile_path = str(path)
+            self.stages.append(record)
+            LOGGER.info(
+                "Etapa %s %s em %.2fs (pico RSS %.1f MB)",
+                name,
+                "falhou" if record.error else "concluída",
+                record.wall_s,
+                record.peak_rss_mb,
+                extra={"metrics": asdict(record)},
+            )
+
+    def to_dict(self) -> Dict:
+        return {"stages": [asdict(stage) for stage in self.stages]}
+
+    def write_json(self, path: Path) -> None:
+        """Write the collected stages as a JSON report."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
@@ -2,27 +2,60 @@
 
 from __future__ import annotations
 
+from typing import Callable, Dict, List
+
+import numpy as np
 import pandas as pd
 from sklearn.compose import ColumnTransformer
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import Ridge
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
 
-from .constants import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUMERIC_COLUMNS
+from .constants import (
+    CATEGORICAL_COLUMNS,
+    FEATURE_COLUMNS,
+    GENRE_LIST_COLUMN,
+    GENRE_SEPARATOR,
+    NUMERIC_COLUMNS,
+)
 
+DEFAULT_ENGINE = "random_forest"
 
-def build_model() -> Pipeline:
-    """Return an untrained sklearn pipeline for this regression task."""
-    preprocessor = ColumnTransformer(
+
+def split_genres(genres: str) -> List[str]:
+    """Tokenize a comma-separated genre list (module level so fitted pipelines pickle)."""
+    return [genre.strip() for genre in genres.split(GENRE_SEPARATOR) if genre.strip()]
+
+
+def _multi_hot_preprocessor() -> ColumnTransformer:
+    """Scaled numerics, multi-hot genres and one-hot state, output as CSR.
+
+    Each row has two numeric entries, one per genre and one for the state, so
+    memory follows the non-zeros instead of the vocabulary width.
+    """
+    return ColumnTransformer(
         transformers=[
             ("num", StandardScaler(), NUMERIC_COLUMNS),
             (
-                "cat",
-                OneHotEncoder(handle_unknown="ignore", sparse_output=False),
-                CATEGORICAL_COLUMNS,
+                "genres",
+                CountVectorizer(
+                    tokenizer=split_genres,
+                    token_pattern=None,
+                    lowercase=False,
+                    binary=True,
+                    dtype=np.float64,
+                ),
+                GENRE_LIST_COLUMN,
             ),
-        ]
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["estado"]),
+        ],
+        sparse_threshold=1.0,
     )
+
+
+def _random_forest() -> Pipeline:
     regressor = RandomForestRegressor(
         n_estimators=300,
         max_depth=12,
@@ -30,12 +63,71 @@ def build_model() -> Pipeline:
         random_state=42,
         n_jobs=-1,
     )
+    return Pipeline([("preprocess", _multi_hot_preprocessor()), ("regressor", regressor)])
+
+
+def _hist_gradient_boosting() -> Pipeline:
+    # Categories are integer-coded and split natively by the booster; unseen
+    # values become NaN, which it routes like missing values.
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("num", "passthrough", NUMERIC_COLUMNS),
+            (
+                "cat",
+                OrdinalEncoder(
+                    handle_unknown="use_encoded_value",
+                    unknown_value=np.nan,
+                    encoded_missing_value=np.nan,
+                ),
+                CATEGORICAL_COLUMNS,
+            ),
+        ]
+    )
+    n_numeric = len(NUMERIC_COLUMNS)
+    regressor = HistGradientBoostingRegressor(
+        categorical_features=list(range(n_numeric, n_numeric + len(CATEGORICAL_COLUMNS))),
+        max_iter=300,
+        learning_rate=0.1,
+        random_state=42,
+    )
     return Pipeline([("preprocess", preprocessor), ("regressor", regressor)])
 
 
-def train_model(training_df: pd.DataFrame) -> Pipeline:
+def _linear() -> Pipeline:
+    return Pipeline(
+        [("preprocess", _multi_hot_preprocessor()), ("regressor", Ridge(alpha=1.0))]
+    )
+
+
+MODEL_ENGINES: Dict[str, Callable[[], Pipeline]] = {
+    "random_forest": _random_forest,
+    "hist_gradient_boosting": _hist_gradient_boosting,
+    "linear": _linear,
+}
+
+
+def build_model(engine: str = DEFAULT_ENGINE) -> Pipeline:
+    """Return an untrained sklearn pipeline for this regression task.
+
+    Every engine is a ``preprocess`` + ``regressor`` pipeline whose state
+    encoder is the step named ``cat``, which is what the batched scorer relies
+    on. The forest and linear engines train on sparse multi-hot genres; the
+    gradient-boosting engine splits the leading genre natively instead.
+    """
+    try:
+        factory = MODEL_ENGINES[engine]
+    except KeyError:
+        raise ValueError(
+            f"Engine de modelo inválida {engine!r}; use uma de {sorted(MODEL_ENGINES)}."
+        ) from None
+    return factory()
+
+
+def train_model(training_df: pd.DataFrame, engine: str = DEFAULT_ENGINE) -> Pipeline:
     """Fit the pipeline using the curated training dataframe."""
-    model = build_model()
-    model.fit(training_df[FEATURE_COLUMNS], training_df["nota"])
+    model = build_model(engine)
+    # Compact training sets keep numerics as float32; scaling them in float64
+    # fits the same model as the default dtypes.
+    features = training_df[FEATURE_COLUMNS].astype({col: "float64" for col in NUMERIC_COLUMNS})
+    model.fit(features, training_df["nota"])
     return model
-
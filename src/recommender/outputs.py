@@ -0,0 +1,112 @@
+"""Parquet layout of the published predictions and a reader that prunes by state."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+PARTITION_COLUMN = "Estado"
+SCORE_COLUMN = "PredicaoModelo"
+
+
+def _row_group_slices(states: np.ndarray) -> Iterable[slice]:
+    """Split a sorted state array into one slice per state.
+
+    One row group per state costs a footer entry per column and state (a few
+    hundred for the 50 states), and lets a one-state read touch one group.
+    """
+    bounds = [0, *(np.flatnonzero(states[1:] != states[:-1]) + 1), len(states)]
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        yield slice(int(start), int(stop))
+
+
+def write_predictions(
+    predictions: pd.DataFrame,
+    path: Path,
+    order_by: Sequence[str] = (),
+) -> int:
+    """Write ``predictions`` row-grouped by state and return the file size.
+
+    Rows are sorted by state, then ``order_by``, then best score first, and
+    each state is its own row group (its ``Estado`` statistics are that state),
+    so a state's top-N are its group's first rows. String columns are dictionary
+    encoded; statistics are kept for the columns readers prune on. The file is
+    written next to ``path`` and renamed over it, so readers (e.g. the serving
+    index) never see a partial file.
+    """
+    ordered = predictions.sort_values(
+        [PARTITION_COLUMN, *order_by, SCORE_COLUMN],
+        ascending=[True, *[True] * len(order_by), False],
+        kind="stable",
+    )
+    table = pa.Table.from_pandas(ordered, preserve_index=False)
+    strings = [
+        field.name
+        for field in table.schema
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type)
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with pq.ParquetWriter(
+        tmp_path,
+        table.schema,
+        use_dictionary=strings,
+        write_statistics=[PARTITION_COLUMN, *order_by, SCORE_COLUMN],
+    ) as writer:
+        states = ordered[PARTITION_COLUMN].to_numpy()
+        for group in _row_group_slices(states):
+            writer.write_table(table.slice(group.start, group.stop - group.start))
+    os.replace(tmp_path, path)
+    return path.stat().st_size
+
+
+def _row_groups_for(metadata: pq.FileMetaData, states: List[str]) -> List[int]:
+    """Row groups whose ``Estado`` min/max range may contain one of ``states``."""
+    column = metadata.schema.names.index(PARTITION_COLUMN)
+    selected = []
+    for index in range(metadata.num_row_groups):
+        stats = metadata.row_group(index).column(column).statistics
+        if (
+            stats is None
+            or not stats.has_min_max
+            or any(stats.min <= state <= stats.max for state in states)
+        ):
+            selected.append(index)
+    return selected
+
+
+def read_predictions(
+    path: Path,
+    states: Optional[Iterable[str]] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Read the predictions of ``states`` (all of them when ``None``).
+
+    Only the row groups whose statistics can hold the requested states are read,
+    so one state costs one row group however large the file grows. Files written
+    before the per-state layout are still read correctly, just without pruning.
+    """
+    parquet = pq.ParquetFile(path)
+    if states is None:
+        return parquet.read(columns=columns).to_pandas()
+
+    wanted = sorted(set(states))
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys([*columns, PARTITION_COLUMN]))
+    table = parquet.read_row_groups(
+        _row_groups_for(parquet.metadata, wanted), columns=read_columns
+    )
+    # Typed explicitly: an empty list would otherwise make a null array.
+    value_set = pa.array(wanted, type=table.schema.field(PARTITION_COLUMN).type)
+    table = table.filter(pc.is_in(table[PARTITION_COLUMN], value_set=value_set))
+    if columns is not None:
+        table = table.select(list(columns))
+    return table.to_pandas()
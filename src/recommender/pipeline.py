@@ -3,53 +3,304 @@
 from __future__ import annotations
 
 import logging
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
+from sklearn.pipeline import Pipeline
+from sqlalchemy.engine import Engine
 
+from .cache import StageCache, cached_frame, file_digest
 from .config import (
     DEFAULT_SCHEMA,
     DEFAULT_TABLE_NAME,
+    DEFAULT_USER_TABLE_NAME,
     imdb_movies_path,
     load_database_config,
+    metrics_report_path,
+    model_engine,
+    model_registry_dir,
     output_predictions_path,
+    output_user_predictions_path,
+    stage_cache_dir,
+    stage_cache_max_bytes,
+    training_snapshot_dir,
 )
-from .constants import CANDIDATE_LIMIT
+from .constants import CANDIDATE_CHUNK_SIZE
 from .database import build_engine, write_table
-from .datasets import build_training_dataset, prepare_candidate_movies
-from .modeling import train_model
-from .predictor import generate_predictions
+from .datasets import (
+    build_training_dataset,
+    build_training_dataset_in_database,
+    iter_candidate_movies,
+    refresh_training_view,
+    training_csv_paths,
+)
+from .metrics import RunMetrics, StageMetrics
+from .outputs import write_predictions
+from .predictor import (
+    generate_streaming_predictions,
+    generate_user_predictions,
+    model_states,
+)
+from .registry import latest_fingerprint, load_latest_model, load_or_train_model
+from .snapshots import refresh_training_snapshot
 
 LOGGER = logging.getLogger(__name__)
 
 
-def run_pipeline() -> pd.DataFrame:
-    """Execute the full training + inference workflow and return the predictions."""
-    config = load_database_config()
-    engine = build_engine(config)
+def _counting(chunks: Iterable[pd.DataFrame], record: StageMetrics) -> Iterator[pd.DataFrame]:
+    """Pass chunks through while tallying rows and in-memory bytes into ``record``."""
+    record.rows_in, record.frame_bytes = 0, 0
+    for chunk in chunks:
+        record.rows_in += len(chunk)
+        record.frame_bytes += int(chunk.memory_usage(deep=True).sum())
+        yield chunk
+
+
+def _stage_cache(use_cache: bool) -> Optional[StageCache]:
+    return StageCache(stage_cache_dir(), stage_cache_max_bytes()) if use_cache else None
+
+
+def _check_compact(compact: bool, load_from_database: bool) -> None:
+    # The snapshot and in-database paths read their frames from PostgreSQL.
+    if compact and load_from_database:
+        raise ValueError(
+            "Os dtypes compactos só se aplicam ao dataset montado a partir dos CSVs; "
+            "não são compatíveis com load_from_database."
+        )
+
+
+def _load_training(
+    engine: Engine,
+    load_from_database: bool,
+    assemble_in_database: bool,
+    metrics: RunMetrics,
+    compact: bool = False,
+    cache: Optional[StageCache] = None,
+) -> Tuple[pd.DataFrame, List[str]]:
     LOGGER.info("Carregando dados do DW...")
-    training_df, states = build_training_dataset(engine)
-    if training_df.empty:
-        raise RuntimeError("Não foi possível montar o dataset de treinamento a partir do DW.")
-
-    LOGGER.info("Treinando modelo com %d avaliações e %d estados.", len(training_df), len(states))
-    model = train_model(training_df)
-
-    LOGGER.info("Preparando filmes candidatos a partir do dataset IMDb...")
-    candidate_movies = prepare_candidate_movies(imdb_movies_path(), CANDIDATE_LIMIT)
-
-    LOGGER.info("Gerando previsões personalizadas por estado...")
-    predictions = generate_predictions(model, candidate_movies, states)
-    LOGGER.info("Persistindo previsões no schema %s.%s", DEFAULT_SCHEMA, DEFAULT_TABLE_NAME)
-    write_table(
-        engine,
-        predictions,
-        schema=DEFAULT_SCHEMA,
-        table_name=DEFAULT_TABLE_NAME,
-        if_exists="replace",
-    )
-
-    output_path = output_predictions_path()
+    with metrics.stage("load_training") as record:
+        if load_from_database and assemble_in_database:
+            refresh_training_view(engine)
+            training_df, states = build_training_dataset_in_database(
+                engine, use_materialized_view=True
+            )
+        elif load_from_database:
+            training_df, states = refresh_training_snapshot(engine, training_snapshot_dir())
+        elif cache is not None:
+            # The snapshot and in-database paths are refreshed incrementally;
+            # only the CSV assembly is rebuilt from scratch on every run.
+            inputs = [(path.name, file_digest(path)) for path in training_csv_paths()]
+            training_df, hit = cached_frame(
+                cache,
+                "training",
+                cache.key("training", inputs, compact),
+                lambda: build_training_dataset(engine, compact=compact)[0],
+            )
+            states = sorted(training_df["estado"].unique().tolist())
+            record.cache = "hit" if hit else "miss"
+            if not hit:
+                record.bytes_read = sum(path.stat().st_size for path in training_csv_paths())
+        else:
+            training_df, states = build_training_dataset(engine, compact=compact)
+            record.bytes_read = sum(path.stat().st_size for path in training_csv_paths())
+        record.rows_out = len(training_df)
+        record.frame_bytes = int(training_df.memory_usage(deep=True).sum())
+        if training_df.empty:
+            raise RuntimeError("Não foi possível montar o dataset de treinamento a partir do DW.")
+    return training_df, states
+
+
+def _train(training_df: pd.DataFrame, states: List[str], metrics: RunMetrics) -> Pipeline:
+    LOGGER.info("Obtendo modelo para %d avaliações e %d estados.", len(training_df), len(states))
+    with metrics.stage("model", rows_in=len(training_df)):
+        return load_or_train_model(training_df, model_registry_dir(), model_engine())
+
+
+def _predict_and_publish(
+    engine: Engine,
+    model: Pipeline,
+    states: List[str],
+    training_df: Optional[pd.DataFrame],
+    per_user: bool,
+    workers: int,
+    metrics: RunMetrics,
+    cache: Optional[StageCache] = None,
+) -> pd.DataFrame:
+    with metrics.stage("predict") as record:
+        candidate_chunks = _counting(
+            iter_candidate_movies(imdb_movies_path(), CANDIDATE_CHUNK_SIZE), record
+        )
+        cache_key, hits = "", 0
+        if cache is not None:
+            # Scores depend only on the registered model and the candidates file.
+            cache_key = cache.key(
+                "candidates",
+                latest_fingerprint(model_registry_dir()),
+                file_digest(imdb_movies_path()),
+            )
+            hits = cache.hits.get("scores", 0)
+        if per_user:
+            LOGGER.info("Gerando previsões por usuário sobre o catálogo IMDb completo...")
+            predictions = generate_user_predictions(
+                model,
+                candidate_chunks,
+                training_df[["usuariosk", "estado"]].drop_duplicates("usuariosk"),
+                training_df[["usuariosk", "filmenome", "anodelancamento"]],
+                workers=workers,
+                cache=cache,
+                cache_key=cache_key,
+            )
+        else:
+            LOGGER.info("Gerando previsões por estado sobre o catálogo IMDb completo...")
+            predictions = generate_streaming_predictions(
+                model, candidate_chunks, states, workers=workers, cache=cache, cache_key=cache_key
+            )
+        record.rows_out = len(predictions)
+        if cache is not None:
+            record.cache = "hit" if cache.hits.get("scores", 0) > hits else "miss"
+
+    table_name = DEFAULT_USER_TABLE_NAME if per_user else DEFAULT_TABLE_NAME
+    LOGGER.info("Persistindo previsões no schema %s.%s", DEFAULT_SCHEMA, table_name)
+    with metrics.stage("write_table", rows_in=len(predictions)) as record:
+        record.frame_bytes = int(predictions.memory_usage(deep=True).sum())
+        record.bytes_written = write_table(
+            engine,
+            predictions,
+            schema=DEFAULT_SCHEMA,
+            table_name=table_name,
+            if_exists="replace",
+            index_columns=("UsuarioSK",) if per_user else ("Estado",),
+        )
+
+    output_path = output_user_predictions_path() if per_user else output_predictions_path()
     LOGGER.info("Salvando arquivo parquet em %s", output_path)
-    predictions.to_parquet(output_path, index=False)
+    with metrics.stage("write_parquet", rows_in=len(predictions)) as record:
+        record.bytes_written = write_predictions(
+            predictions, output_path, order_by=("UsuarioSK",) if per_user else ()
+        )
     return predictions
 
+
+def _write_metrics(metrics: RunMetrics, cache: Optional[StageCache] = None) -> None:
+    """Write the report; called from ``finally`` so failed runs leave one too."""
+    if cache is not None:
+        LOGGER.info("Cache de etapas: %s", cache.summary())
+    report_path = metrics_report_path()
+    metrics.write_json(report_path)
+    LOGGER.info("Métricas por etapa gravadas em %s", report_path)
+
+
+def run_training(
+    load_from_database: bool = False,
+    assemble_in_database: bool = False,
+    *,
+    compact: bool = False,
+    use_cache: bool = True,
+    metrics: Optional[RunMetrics] = None,
+) -> Pipeline:
+    """Fit (or reuse) the model for the current training set and register it.
+
+    The registered model becomes the one :func:`run_inference` scores with.
+    """
+    _check_compact(compact, load_from_database)
+    metrics = metrics or RunMetrics()
+    cache = _stage_cache(use_cache)
+    try:
+        engine = build_engine(load_database_config())
+        training_df, states = _load_training(
+            engine, load_from_database, assemble_in_database, metrics, compact, cache
+        )
+        return _train(training_df, states, metrics)
+    finally:
+        _write_metrics(metrics, cache)
+
+
+def run_inference(
+    load_from_database: bool = False,
+    *,
+    per_user: bool = False,
+    workers: int = 1,
+    compact: bool = False,
+    use_cache: bool = True,
+    metrics: Optional[RunMetrics] = None,
+) -> pd.DataFrame:
+    """Score the IMDb catalog with the latest registered model and publish it.
+
+    Per-state runs take the states from the model itself and skip the training
+    data; ``per_user=True`` still loads it for each user's state and rated
+    titles.
+    """
+    _check_compact(compact, load_from_database)
+    metrics = metrics or RunMetrics()
+    cache = _stage_cache(use_cache)
+    try:
+        engine = build_engine(load_database_config())
+        with metrics.stage("model"):
+            model = load_latest_model(model_registry_dir())
+        training_df = None
+        if per_user:
+            training_df, _ = _load_training(
+                engine, load_from_database, False, metrics, compact, cache
+            )
+        return _predict_and_publish(
+            engine, model, model_states(model), training_df, per_user, workers, metrics, cache
+        )
+    finally:
+        _write_metrics(metrics, cache)
+
+
+def run_pipeline(
+    load_from_database: bool = False,
+    assemble_in_database: bool = False,
+    *,
+    per_user: bool = False,
+    workers: int = 1,
+    compact: bool = False,
+    use_cache: bool = True,
+    metrics: Optional[RunMetrics] = None,
+) -> pd.DataFrame:
+    """Execute the full training + inference workflow and return the predictions.
+
+    With ``load_from_database=True`` the training set comes from the local DW
+    snapshot, refreshed with only the fact rows added since the last run. Adding
+    ``assemble_in_database=True`` instead refreshes the training materialized
+    view and reads the joined features straight from PostgreSQL.
+
+    ``per_user=True`` ranks candidates per user instead of per state, leaving
+    out titles each user already rated, and writes to
+    :data:`DEFAULT_USER_TABLE_NAME`. ``workers`` scores candidate chunks in that
+    many processes. ``compact=True`` assembles the training set from the CSVs
+    with compact dtypes (see :func:`build_training_dataset`); it is rejected
+    with ``load_from_database``.
+
+    With ``use_cache`` the assembled training set and the candidate scores are
+    kept in the stage cache (:func:`stage_cache_dir`), keyed by a hash of their
+    inputs, so a rerun with unchanged CSVs, model and candidates (e.g. after a
+    failed database write) skips straight to publishing.
+
+    Per-stage timings, memory peaks and row/byte counts are collected in
+    ``metrics`` (a default :class:`RunMetrics` when omitted) and written to
+    :func:`metrics_report_path` at the end of the run, also when it fails (the
+    failing stage carries the exception in ``error``). ``bytes_read`` and
+    ``bytes_written`` count file/database I/O where it is known;
+    ``frame_bytes`` is the in-memory size of the frames a stage handled.
+    """
+    if per_user and assemble_in_database:
+        raise ValueError(
+            "O modo por usuário precisa das avaliações por usuário; "
+            "não é compatível com assemble_in_database."
+        )
+    _check_compact(compact, load_from_database)
+    metrics = metrics or RunMetrics()
+    cache = _stage_cache(use_cache)
+    try:
+        engine = build_engine(load_database_config())
+        training_df, states = _load_training(
+            engine, load_from_database, assemble_in_database, metrics, compact, cache
+        )
+        model = _train(training_df, states, metrics)
+        return _predict_and_publish(
+            engine, model, states, training_df, per_user, workers, metrics, cache
+        )
+    finally:
+        _write_metrics(metrics, cache)
@@ -2,41 +2,359 @@
 
 from __future__ import annotations
 
-from typing import List
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
 
-from .constants import FEATURE_COLUMNS, TOP_K_PER_STATE
+from .cache import StageCache, cached_scores
+from .constants import SCORING_BATCH_SIZE, TOP_K_PER_STATE
 
+STATE_COLUMN = "estado"
 
-def generate_predictions(
+
+def _state_block(preprocessor: ColumnTransformer) -> Tuple[int, List[str], bool]:
+    """Locate the ``estado`` encoding in the transformed matrix.
+
+    Returns its first column, the known categories and whether it is a one-hot
+    block (``OneHotEncoder``) or a single integer-coded column (``OrdinalEncoder``).
+    """
+    encoder = preprocessor.named_transformers_["cat"]
+    one_hot = isinstance(encoder, OneHotEncoder)
+    offset = preprocessor.output_indices_["cat"].start
+    for column, categories in zip(encoder.feature_names_in_, encoder.categories_):
+        if column == STATE_COLUMN:
+            return offset, list(categories), one_hot
+        offset += len(categories) if one_hot else 1
+    raise ValueError("O pré-processador não possui a coluna 'estado'.")
+
+
+def model_states(model: Pipeline) -> List[str]:
+    """Return the states a fitted pipeline was trained on."""
+    return _state_block(model.named_steps["preprocess"])[1]
+
+
+def score_states(
     model: Pipeline,
     base_movies: pd.DataFrame,
     states: List[str],
-    top_k_per_state: int = TOP_K_PER_STATE,
+    batch_size: int = SCORING_BATCH_SIZE,
+) -> np.ndarray:
+    """Score every (state, movie) pair and return a ``(len(states), len(movies))`` array.
+
+    The movie features go through the ``ColumnTransformer`` a single time; the
+    state encoding is then filled in directly on the transformed matrix, so
+    the regressor sees exactly what ``model.predict`` would build per state.
+    Sparse (CSR) features stay sparse, so each batch costs its non-zeros rather
+    than ``batch_size`` times the feature width.
+    """
+    preprocessor = model.named_steps["preprocess"]
+    regressor = model.named_steps["regressor"]
+    n_states, n_movies = len(states), len(base_movies)
+    scores = np.empty(n_states * n_movies, dtype=np.float64)
+    if scores.size == 0:
+        return scores.reshape(n_states, n_movies)
+
+    features = base_movies.assign(**{STATE_COLUMN: states[0]})
+    movie_matrix = preprocessor.transform(features)
+    block_start, known_states, one_hot = _state_block(preprocessor)
+    lookup = {state: idx for idx, state in enumerate(known_states)}
+    state_codes = np.array([lookup.get(state, -1) for state in states], dtype=np.int64)
+    sparse = sp.issparse(movie_matrix)
+    if sparse:
+        # Clear the state block in place; pairs then get a single 1 added per row.
+        movie_matrix = sp.csr_matrix(movie_matrix, dtype=np.float64)
+        block = (movie_matrix.indices >= block_start) & (
+            movie_matrix.indices < block_start + len(known_states)
+        )
+        movie_matrix.data[block] = 0.0
+        movie_matrix.eliminate_zeros()
+    elif one_hot:
+        movie_matrix = np.asarray(movie_matrix, dtype=np.float64)
+        # Unknown states keep an all-zero block, mirroring handle_unknown="ignore".
+        movie_matrix[:, block_start : block_start + len(known_states)] = 0.0
+    else:
+        movie_matrix = np.asarray(movie_matrix, dtype=np.float64)
+        unknown = preprocessor.named_transformers_["cat"].unknown_value
+        state_values = np.where(state_codes >= 0, state_codes, unknown).astype(np.float64)
+
+    for start in range(0, scores.size, batch_size):
+        pairs = np.arange(start, min(start + batch_size, scores.size))
+        state_idx, movie_idx = np.divmod(pairs, n_movies)
+        batch = movie_matrix[movie_idx]
+        if one_hot:
+            codes = state_codes[state_idx]
+            known = codes >= 0
+            rows, columns = np.flatnonzero(known), block_start + codes[known]
+            if sparse:
+                batch = batch + sp.csr_matrix(
+                    (np.ones(len(rows)), (rows, columns)), shape=batch.shape
+                )
+            else:
+                batch[rows, columns] = 1.0
+        else:
+            batch[:, block_start] = state_values[state_idx]
+        scores[start : start + len(pairs)] = regressor.predict(batch)
+
+    np.clip(scores, 1.0, 5.0, out=scores)
+    return scores.reshape(n_states, n_movies)
+
+
+def _select_top_k(
+    scores: np.ndarray, ids: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep the ``k`` best columns of every row without sorting the whole row.
+
+    ``ids`` must be ascending along each row; ties at the cut-off favour the
+    smallest ids and the survivors stay in id order, so repeated merges give the
+    same result as ranking the full catalog at once.
+    """
+    n_rows, n_cols = scores.shape
+    if n_cols <= k:
+        return scores, ids
+    kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1 : k]
+    above = scores > kth
+    ties = scores == kth
+    missing = k - above.sum(axis=1, keepdims=True)
+    keep = above | (ties & (np.cumsum(ties, axis=1) <= missing))
+    columns = np.nonzero(keep)[1].reshape(n_rows, k)
+    return (
+        np.take_along_axis(scores, columns, axis=1),
+        np.take_along_axis(ids, columns, axis=1),
+    )
+
+
+_WORKER_MODEL: Optional[Pipeline] = None
+
+
+def _init_scoring_worker(model: Pipeline) -> None:
+    global _WORKER_MODEL
+    # The pool already provides the parallelism; avoid oversubscribing cores.
+    # Only some regressors (the forest) take n_jobs.
+    if "n_jobs" in model.named_steps["regressor"].get_params():
+        model.set_params(regressor__n_jobs=1)
+    _WORKER_MODEL = model
+
+
+def _score_in_worker(chunk: pd.DataFrame, states: List[str], batch_size: int) -> np.ndarray:
+    return score_states(_WORKER_MODEL, chunk, states, batch_size=batch_size)
+
+
+def _scored_chunks(
+    model: Pipeline,
+    movie_chunks: Iterable[pd.DataFrame],
+    states: List[str],
+    batch_size: int,
+    workers: int,
+) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+    """Yield ``(chunk, state scores)`` in chunk order, scoring in worker processes if asked.
+
+    The pool is forked where the platform allows it, after the model was
+    loaded, so workers share the parent's copy of the model (the forest's node
+    arrays included) copy-on-write instead of each unpickling its own; elsewhere
+    each worker receives a pickled copy once. At most ``2 * workers`` chunks are
+    in flight so memory stays bounded.
+    """
+    chunks = (chunk for chunk in movie_chunks if not chunk.empty)
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, score_states(model, chunk, states, batch_size=batch_size)
+        return
+
+    pending: Deque[Tuple[pd.DataFrame, Future]] = deque()
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork") if fork else None,
+        initializer=_init_scoring_worker,
+        initargs=(model,),
+    ) as pool:
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(_score_in_worker, chunk, states, batch_size)))
+            if len(pending) >= 2 * workers:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+
+def _rank_by_state(
+    model: Pipeline,
+    movie_chunks: Iterable[pd.DataFrame],
+    states: List[str],
+    top_k_per_state: int,
+    batch_size: int,
+    workers: int,
+    cache: Optional[StageCache] = None,
+    cache_key: str = "",
 ) -> pd.DataFrame:
-    """Return ranked recommendations for every state."""
+    """Return the best ``top_k_per_state`` candidates per state, best first, unformatted.
+
+    With a ``cache``, the candidate scores of these states are stored under
+    ``cache_key`` (which must identify the model and the candidates) and
+    replayed instead of recomputed.
+    """
     if not states:
         raise ValueError("Nenhum estado encontrado para gerar previsões.")
 
-    all_predictions = []
-    feature_ready = base_movies.copy()
+    ordered_states = sorted(states)
+    scored = _scored_chunks(model, movie_chunks, ordered_states, batch_size, workers)
+    if cache is not None:
+        key = cache.key("scores", cache_key, ordered_states)
+        scored = cached_scores(cache, key, len(ordered_states), scored)
+    best_scores = np.empty((len(ordered_states), 0), dtype=np.float64)
+    best_ids = np.empty((len(ordered_states), 0), dtype=np.int64)
+    kept = None
+    offset = 0
+
+    for chunk, scores in scored:
+        chunk = chunk.reset_index(drop=True)
+        chunk.index += offset
+        chunk_ids = np.broadcast_to(chunk.index.to_numpy(dtype=np.int64), scores.shape)
+        best_scores, best_ids = _select_top_k(
+            np.hstack([best_scores, scores]),
+            np.hstack([best_ids, chunk_ids]),
+            top_k_per_state,
+        )
+        pool = chunk if kept is None else pd.concat([kept, chunk])
+        kept = pool.loc[np.unique(best_ids)]
+        offset += len(chunk)
+
+    if kept is None:
+        raise ValueError("Nenhum filme candidato disponível para gerar previsões.")
+
+    # Stable ordering keeps ties in catalog order, as the former sort_values did.
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    ranked_ids = np.take_along_axis(best_ids, order, axis=1)
+    combined = kept.loc[ranked_ids.ravel()].reset_index(drop=True)
+    combined["estado"] = np.repeat(ordered_states, ranked_ids.shape[1])
+    combined["predicaomodelo"] = np.take_along_axis(best_scores, order, axis=1).ravel()
+    return combined
+
+
+def generate_streaming_predictions(
+    model: Pipeline,
+    movie_chunks: Iterable[pd.DataFrame],
+    states: List[str],
+    top_k_per_state: int = TOP_K_PER_STATE,
+    batch_size: int = SCORING_BATCH_SIZE,
+    workers: int = 1,
+    cache: Optional[StageCache] = None,
+    cache_key: str = "",
+) -> pd.DataFrame:
+    """Rank candidates arriving in chunks, keeping only a running top-K per state.
+
+    Memory is bounded by one chunk plus ``len(states) * top_k_per_state`` kept
+    movies, so the whole catalog can be scored without a candidate cap. With
+    ``workers > 1`` chunks are scored in a process pool. ``cache`` and
+    ``cache_key`` reuse the scores of a previous run (see :func:`_rank_by_state`).
+    """
+    return _format_output(
+        _rank_by_state(
+            model, movie_chunks, states, top_k_per_state, batch_size, workers, cache, cache_key
+        )
+    )
+
+
+def generate_user_predictions(
+    model: Pipeline,
+    movie_chunks: Iterable[pd.DataFrame],
+    user_states: pd.DataFrame,
+    rated_titles: pd.DataFrame,
+    top_k_per_user: int = TOP_K_PER_STATE,
+    batch_size: int = SCORING_BATCH_SIZE,
+    workers: int = 1,
+    cache: Optional[StageCache] = None,
+    cache_key: str = "",
+) -> pd.DataFrame:
+    """Rank candidates for every user, leaving out titles the user already rated.
+
+    ``user_states`` holds ``(usuariosk, estado)`` and ``rated_titles`` holds
+    ``(usuariosk, filmenome, anodelancamento)``. The model only sees a user
+    through their ``estado``, so all users of a state share the same scores:
+    candidates are scored once per state, keeping ``top_k_per_user`` plus as
+    many extra titles as that state's heaviest rater has rated. Each user then
+    reads ``top_k_per_user`` ranks plus one per rated title found in their
+    state's ranking, so memory grows with ``users * top_k_per_user`` and not
+    with any user's history. The result is the same as scoring every (user,
+    candidate) pair, at the cost of scoring (state, candidate).
+    """
+    if user_states.empty:
+        raise ValueError("Nenhum usuário com estado para gerar previsões.")
+
+    title_key = ["filmenome", "anodelancamento"]
+    users = (
+        user_states[["usuariosk", "estado"]]
+        .astype({"usuariosk": "int64", "estado": str})
+        .reset_index(drop=True)
+    )
+    rated = (
+        rated_titles[["usuariosk"] + title_key]
+        .dropna()
+        .astype({"usuariosk": "int64", "anodelancamento": "float64"})
+        .drop_duplicates()
+        .merge(users, on="usuariosk")
+    )
+    state_slack = rated.groupby(["estado", "usuariosk"]).size().groupby(level="estado").max()
+
+    ranked = _rank_by_state(
+        model,
+        movie_chunks,
+        users["estado"].unique().tolist(),
+        top_k_per_user + int(state_slack.max() if not state_slack.empty else 0),
+        batch_size,
+        workers,
+        cache,
+        cache_key,
+    )
+    ranked["rank"] = ranked.groupby("estado").cumcount()
+    ranked["anodelancamento"] = ranked["anodelancamento"].astype("float64")
+    depth = top_k_per_user + ranked["estado"].map(state_slack).fillna(0)
+    ranked = ranked[ranked["rank"] < depth].reset_index(drop=True)
 
-    for state in states:
-        state_frame = feature_ready.copy()
-        state_frame["estado"] = state
-        preds = model.predict(state_frame[FEATURE_COLUMNS])
-        state_frame["predicaomodelo"] = np.clip(preds, 1.0, 5.0)
-        state_frame["estado"] = state
-        all_predictions.append(state_frame)
+    # Ranks of each user's own titles in their state's ranking.
+    seen = rated.merge(ranked[["estado", "rank"] + title_key], on=["estado"] + title_key)
+    seen = seen[["usuariosk", "rank"]].drop_duplicates()
+    available = users["estado"].map(ranked.groupby("estado").size()).fillna(0)
+    wanted = top_k_per_user + users["usuariosk"].map(seen.groupby("usuariosk").size()).fillna(0)
+    slots = users.loc[users.index.repeat(np.minimum(wanted, available).astype("int64"))]
+    slots["rank"] = slots.groupby("usuariosk").cumcount()
 
-    combined = pd.concat(all_predictions, ignore_index=True)
-    combined = combined.sort_values(["estado", "predicaomodelo"], ascending=[True, False])
-    combined = combined.groupby("estado").head(top_k_per_state).reset_index(drop=True)
+    pairs = slots.merge(ranked, on=["estado", "rank"])
+    pairs = pairs.merge(seen.assign(avaliado=True), on=["usuariosk", "rank"], how="left")
+    pairs = pairs[pairs["avaliado"].isna()].drop(columns=["avaliado"])
+    pairs = pairs.sort_values(["usuariosk", "rank"], kind="stable")
+    combined = pairs.groupby("usuariosk").head(top_k_per_user).reset_index(drop=True)
+    return _format_output(combined.drop(columns=["rank"]))
 
-    # Add surrogate key and convert column names back to the DW-friendly format.
+
+def generate_predictions(
+    model: Pipeline,
+    base_movies: pd.DataFrame,
+    states: List[str],
+    top_k_per_state: int = TOP_K_PER_STATE,
+    batch_size: int = SCORING_BATCH_SIZE,
+) -> pd.DataFrame:
+    """Return ranked recommendations for every state."""
+    return generate_streaming_predictions(
+        model,
+        [base_movies],
+        states,
+        top_k_per_state=top_k_per_state,
+        batch_size=batch_size,
+    )
+
+
+def _format_output(combined: pd.DataFrame) -> pd.DataFrame:
+    """Add the surrogate key and the DW-friendly column names."""
     combined.insert(0, "FilmeIMDbSK", combined.index + 1)
     rename_for_output = {
         "filmenome": "FilmeNome",
@@ -47,6 +365,7 @@ def generate_predictions(
         "imdbnumvotos": "IMDbNumVotos",
         "estado": "Estado",
         "predicaomodelo": "PredicaoModelo",
+        "usuariosk": "UsuarioSK",
     }
     combined = combined.rename(columns=rename_for_output)
 
@@ -61,5 +380,6 @@ def generate_predictions(
         "Estado",
         "PredicaoModelo",
     ]
+    if "UsuarioSK" in combined.columns:
+        final_columns.insert(1, "UsuarioSK")
     return combined[final_columns]
-
@@ -0,0 +1,136 @@
+"""Fingerprint-keyed storage for fitted models.
+
+Artifacts are plain joblib pickles. Independent processes that load the same
+artifact do not share its memory: scikit-learn's ``Tree`` copies its node
+arrays when unpickled, so memory-mapping the file would buy nothing. Within a
+run, the scoring pool is forked after the model is loaded and its workers read
+the parent's copy (see :func:`predictor._scored_chunks`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import joblib
+import pandas as pd
+import sklearn
+from sklearn.pipeline import Pipeline
+
+from .constants import FEATURE_COLUMNS
+from .modeling import DEFAULT_ENGINE, build_model, train_model
+
+LOGGER = logging.getLogger(__name__)
+
+_ARTIFACT_SUFFIX = ".joblib"
+_LATEST_POINTER = "LATEST"
+# Artifacts kept on save, most recently saved or reused first.
+KEEP_ARTIFACTS = 5
+
+
+def model_fingerprint(training_df: pd.DataFrame, model: Pipeline) -> str:
+    """Hash the training frame together with the untrained model's hyperparameters.
+
+    The scikit-learn version is part of the key because pickled estimators are
+    not guaranteed to load across releases.
+    """
+    frame = training_df[FEATURE_COLUMNS + ["nota"]]
+    digest = hashlib.sha256()
+    digest.update(sklearn.__version__.encode())
+    digest.update(joblib.hash(model.get_params(deep=True)).encode())
+    digest.update(repr(list(zip(frame.columns, map(str, frame.dtypes)))).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _artifact_path(registry_dir: Path, fingerprint: str) -> Path:
+    return registry_dir / f"{fingerprint}{_ARTIFACT_SUFFIX}"
+
+
+def save_model(
+    model: Pipeline, fingerprint: str, registry_dir: Path, keep: int = KEEP_ARTIFACTS
+) -> Path:
+    """Store the fitted pipeline, mark it as the latest artifact and prune the registry.
+
+    Only the ``keep`` most recently saved or reused artifacts stay on disk.
+    """
+    registry_dir.mkdir(parents=True, exist_ok=True)
+    path = _artifact_path(registry_dir, fingerprint)
+    tmp_path = path.with_suffix(".tmp")
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+    _mark_latest(fingerprint, registry_dir)
+    prune_registry(registry_dir, keep)
+    return path
+
+
+def _mark_latest(fingerprint: str, registry_dir: Path) -> None:
+    # The artifact's modification time orders it for pruning.
+    os.utime(_artifact_path(registry_dir, fingerprint))
+    pointer_tmp = registry_dir / f"{_LATEST_POINTER}.tmp"
+    pointer_tmp.write_text(fingerprint, encoding="utf-8")
+    os.replace(pointer_tmp, registry_dir / _LATEST_POINTER)
+
+
+def prune_registry(registry_dir: Path, keep: int = KEEP_ARTIFACTS) -> List[Path]:
+    """Delete all but the ``keep`` newest artifacts (never the latest one) and return them."""
+    latest = _artifact_path(registry_dir, latest_fingerprint(registry_dir))
+    artifacts = sorted(
+        registry_dir.glob(f"*{_ARTIFACT_SUFFIX}"),
+        key=lambda path: path.stat().st_mtime_ns,
+        reverse=True,
+    )
+    removed = [path for path in artifacts[keep:] if path != latest]
+    for path in removed:
+        path.unlink(missing_ok=True)
+    if removed:
+        LOGGER.info("Registro de modelos: %d artefato(s) antigo(s) removido(s).", len(removed))
+    return removed
+
+
+def load_model(fingerprint: str, registry_dir: Path) -> Optional[Pipeline]:
+    """Return the stored pipeline for ``fingerprint`` or ``None`` if absent."""
+    path = _artifact_path(registry_dir, fingerprint)
+    if not path.exists():
+        return None
+    return joblib.load(path)
+
+
+def latest_fingerprint(registry_dir: Path) -> str:
+    """Fingerprint of the latest registered pipeline (the one trained or reused last)."""
+    pointer = registry_dir / _LATEST_POINTER
+    if not pointer.exists():
+        raise FileNotFoundError(f"Nenhum modelo registrado em {registry_dir}.")
+    return pointer.read_text(encoding="utf-8").strip()
+
+
+def load_latest_model(registry_dir: Path) -> Pipeline:
+    """Load the most recently registered pipeline, for inference-only runs."""
+    fingerprint = latest_fingerprint(registry_dir)
+    model = load_model(fingerprint, registry_dir)
+    if model is None:
+        raise FileNotFoundError(f"Artefato {fingerprint} ausente em {registry_dir}.")
+    return model
+
+
+def load_or_train_model(
+    training_df: pd.DataFrame,
+    registry_dir: Path,
+    engine: str = DEFAULT_ENGINE,
+    keep: int = KEEP_ARTIFACTS,
+) -> Pipeline:
+    """Reuse the registered model for this training set or fit and register a new one."""
+    fingerprint = model_fingerprint(training_df, build_model(engine))
+    model = load_model(fingerprint, registry_dir)
+    if model is not None:
+        LOGGER.info("Reutilizando modelo registrado %s.", fingerprint[:12])
+        _mark_latest(fingerprint, registry_dir)
+        return model
+
+    LOGGER.info("Nenhum modelo para %s; treinando.", fingerprint[:12])
+    model = train_model(training_df, engine)
+    save_model(model, fingerprint, registry_dir, keep)
+    return model
@@ -0,0 +1,237 @@
+"""In-memory recommendation index with hot reload and a small local HTTP API."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from http import HTTPStatus
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from .config import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_RELOAD_INTERVAL
+from .constants import TOP_K_PER_STATE
+from .outputs import read_predictions
+
+LOGGER = logging.getLogger(__name__)
+
+SERVED_COLUMNS = [
+    "FilmeNome",
+    "AnoDeLancamento",
+    "DuracaoMin",
+    "GeneroNome",
+    "IMDbAvaliacao",
+    "IMDbNumVotos",
+    "PredicaoModelo",
+]
+
+
+class RecommendationIndex:
+    """Recommendations per ``Estado`` (and per ``Estado`` + genre), best first.
+
+    Everything is sorted and converted to plain dicts when the index is built,
+    so a lookup is a dict access plus a list slice. Instances are never mutated;
+    a new parquet produces a new index.
+    """
+
+    def __init__(
+        self,
+        by_state: Dict[str, List[dict]],
+        by_state_genre: Dict[Tuple[str, str], List[dict]],
+        version: str = "",
+    ) -> None:
+        self._by_state = by_state
+        self._by_state_genre = by_state_genre
+        self.version = version
+
+    @classmethod
+    def from_frame(cls, predictions: pd.DataFrame, version: str = "") -> "RecommendationIndex":
+        ordered = predictions.sort_values(
+            ["Estado", "PredicaoModelo"], ascending=[True, False], kind="stable"
+        )
+        served = ordered[SERVED_COLUMNS].astype(object)
+        records = served.where(served.notna(), None).to_dict("records")
+        by_state: Dict[str, List[dict]] = {}
+        by_state_genre: Dict[Tuple[str, str], List[dict]] = {}
+        for state, record in zip(ordered["Estado"], records):
+            by_state.setdefault(state, []).append(record)
+            by_state_genre.setdefault((state, record["GeneroNome"]), []).append(record)
+        return cls(by_state, by_state_genre, version)
+
+    @classmethod
+    def from_parquet(cls, path: Path) -> "RecommendationIndex":
+        stat = path.stat()
+        version = datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat()
+        predictions = read_predictions(path, columns=SERVED_COLUMNS + ["Estado"])
+        return cls.from_frame(predictions, version)
+
+    def states(self) -> List[str]:
+        return sorted(self._by_state)
+
+    def __contains__(self, state: str) -> bool:
+        return state in self._by_state
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._by_state.values())
+
+    def top(self, state: str, n: int = TOP_K_PER_STATE, genre: Optional[str] = None) -> List[dict]:
+        """Return the ``n`` best recommendations for ``state``, optionally of one genre."""
+        if genre is None:
+            return self._by_state.get(state, [])[:n]
+        return self._by_state_genre.get((state, genre), [])[:n]
+
+
+class ReloadingIndex:
+    """Hold the current :class:`RecommendationIndex` and swap it when the parquet changes.
+
+    Readers just take ``.index``; a reload builds the new index completely
+    before replacing the reference, so requests never see a half-built one. The
+    pipeline replaces the parquet atomically, and a file that fails to load
+    leaves the previous index in place.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self.index = RecommendationIndex({}, {})
+        self.reload_if_changed()
+
+    def _current_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def reload_if_changed(self) -> bool:
+        with self._lock:
+            signature = self._current_signature()
+            if signature is None or signature == self._signature:
+                return False
+            try:
+                index = RecommendationIndex.from_parquet(self.path)
+            except Exception as exc:
+                LOGGER.warning("Falha ao recarregar %s; mantendo o índice atual: %s", self.path, exc)
+                return False
+            self.index, self._signature = index, signature
+        LOGGER.info(
+            "Índice carregado de %s: %d recomendações, %d estados.",
+            self.path,
+            len(index),
+            len(index.states()),
+        )
+        return True
+
+
+def _json_response(status: HTTPStatus, payload, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def _route(index: RecommendationIndex, method: str, target: str) -> Tuple[HTTPStatus, object]:
+    if method != "GET":
+        return HTTPStatus.METHOD_NOT_ALLOWED, {"erro": "Apenas GET é suportado."}
+    url = urlsplit(target)
+    if url.path == "/health":
+        return HTTPStatus.OK, {"status": "ok", "versao": index.version, "estados": len(index.states())}
+    if url.path == "/states":
+        return HTTPStatus.OK, index.states()
+    if url.path != "/recommendations":
+        return HTTPStatus.NOT_FOUND, {"erro": f"Rota desconhecida: {url.path}"}
+
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    state = query.get("estado")
+    if not state:
+        return HTTPStatus.BAD_REQUEST, {"erro": "Parâmetro 'estado' é obrigatório."}
+    try:
+        n = int(query.get("n", TOP_K_PER_STATE))
+    except ValueError:
+        return HTTPStatus.BAD_REQUEST, {"erro": "Parâmetro 'n' deve ser inteiro."}
+    if n < 1:
+        return HTTPStatus.BAD_REQUEST, {"erro": "Parâmetro 'n' deve ser positivo."}
+    if state not in index:
+        return HTTPStatus.NOT_FOUND, {"erro": f"Estado sem recomendações: {state}"}
+    genre = query.get("genero")
+    return HTTPStatus.OK, {
+        "estado": state,
+        "genero": genre,
+        "versao": index.version,
+        "recomendacoes": index.top(state, n, genre),
+    }
+
+
+async def _handle_connection(
+    holder: ReloadingIndex, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            keep_alive = True
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header.decode("latin-1").partition(":")
+                if name.strip().lower() == "connection" and value.strip().lower() == "close":
+                    keep_alive = False
+            parts = request_line.decode("latin-1").split()
+            if len(parts) != 3:
+                writer.write(
+                    _json_response(HTTPStatus.BAD_REQUEST, {"erro": "Requisição inválida."}, False)
+                )
+                break
+            method, target, _ = parts
+            # Requests with a body are not supported; close rather than misread it.
+            keep_alive = keep_alive and method == "GET"
+            status, payload = _route(holder.index, method, target)
+            writer.write(_json_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _watch(holder: ReloadingIndex, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        # Building the index is CPU work; keep it off the event loop.
+        await asyncio.to_thread(holder.reload_if_changed)
+
+
+async def serve_forever(
+    path: Path,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    reload_interval: float = DEFAULT_RELOAD_INTERVAL,
+) -> None:
+    """Serve ``GET /recommendations?estado=..&n=..&genero=..`` from ``path``."""
+    holder = ReloadingIndex(path)
+    if not path.exists():
+        LOGGER.warning("%s ainda não existe; aguardando o primeiro arquivo.", path)
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_connection(holder, reader, writer), host, port
+    )
+    watcher = asyncio.create_task(_watch(holder, reload_interval))
+    LOGGER.info("Servindo recomendações em http://%s:%d", host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
@@ -0,0 +1,160 @@
+"""Incrementally refreshed local snapshot of the DW training data."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .datasets import finalize_training_dataset, mode_from_counts
+
+LOGGER = logging.getLogger(__name__)
+
+_MANIFEST = "manifest.json"
+_RATINGS_DIR = "ratings"
+
+_NEW_RATINGS_SQL = text(
+    """
+    SELECT a.avaliacaosk, a.usuariosk, a.filmesk, a.nota,
+           f.filmenome, f.anodelancamento, f.duracaomin, f.generonome
+    FROM dw_alv.avaliacao a
+    LEFT JOIN dw_alv.filme f ON f.filmesk = a.filmesk
+    WHERE a.avaliacaosk > :watermark
+    """
+)
+
+_NEW_STATE_COUNTS_SQL = text(
+    """
+    SELECT r.usuariosk, e.estado, COUNT(*) AS n, MAX(r.receitask) AS receitask
+    FROM dw_alv.receita r
+    JOIN dw_alv.endereco e ON e.enderecosk = r.enderecosk
+    WHERE r.receitask > :watermark
+    GROUP BY r.usuariosk, e.estado
+    """
+)
+
+
+def _read_manifest(snapshot_dir: Path) -> Dict:
+    path = snapshot_dir / _MANIFEST
+    if not path.exists():
+        # Surrogate keys start at 0 in the DW, so -1 means "nothing loaded yet".
+        return {"avaliacaosk": -1, "receitask": -1, "state_counts": None, "user_state": None}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_manifest(snapshot_dir: Path, manifest: Dict) -> None:
+    tmp_path = snapshot_dir / f"{_MANIFEST}.tmp"
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp_path, snapshot_dir / _MANIFEST)
+
+
+def _refresh_user_state(
+    engine: Engine, snapshot_dir: Path, manifest: Dict
+) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+    """Fold new receita rows into the (user, state) counts and recompute affected modes."""
+    counts = (
+        pd.read_parquet(snapshot_dir / manifest["state_counts"])
+        if manifest["state_counts"]
+        else pd.DataFrame({"usuariosk": [], "estado": [], "n": []})
+    )
+    user_state = (
+        pd.read_parquet(snapshot_dir / manifest["user_state"])
+        if manifest["user_state"]
+        else pd.DataFrame({"usuariosk": [], "estado": []})
+    )
+
+    new_counts = pd.read_sql_query(
+        _NEW_STATE_COUNTS_SQL, engine, params={"watermark": manifest["receitask"]}
+    )
+    if new_counts.empty:
+        return counts, user_state, manifest["receitask"]
+
+    watermark = int(new_counts["receitask"].max())
+    counts = (
+        pd.concat([counts, new_counts[["usuariosk", "estado", "n"]]], ignore_index=True)
+        .groupby(["usuariosk", "estado"], as_index=False)["n"]
+        .sum()
+    )
+    affected = new_counts["usuariosk"].unique()
+    recomputed = mode_from_counts(counts[counts["usuariosk"].isin(affected)])
+    user_state = pd.concat(
+        [user_state[~user_state["usuariosk"].isin(affected)], recomputed],
+        ignore_index=True,
+    )
+    LOGGER.info("Estado modal recalculado para %d usuários.", len(affected))
+    return counts, user_state, watermark
+
+
+def _append_new_ratings(engine: Engine, snapshot_dir: Path, watermark: int) -> int:
+    """Store ratings above ``watermark`` as a new part and return the new watermark.
+
+    Parts are named after the first key they may contain, so a run that fails
+    before updating the manifest simply overwrites its own part next time.
+    """
+    new_ratings = pd.read_sql_query(
+        _NEW_RATINGS_SQL, engine, params={"watermark": watermark}
+    )
+    if new_ratings.empty:
+        return watermark
+    ratings_dir = snapshot_dir / _RATINGS_DIR
+    ratings_dir.mkdir(parents=True, exist_ok=True)
+    new_ratings.to_parquet(ratings_dir / f"part-{watermark + 1:012d}.parquet", index=False)
+    LOGGER.info("%d novas avaliações adicionadas ao snapshot.", len(new_ratings))
+    return int(new_ratings["avaliacaosk"].max())
+
+
+def _read_ratings(snapshot_dir: Path, watermark: int) -> pd.DataFrame:
+    ratings_dir = snapshot_dir / _RATINGS_DIR
+    parts: List[Path] = sorted(ratings_dir.glob("part-*.parquet")) if ratings_dir.exists() else []
+    # Parts starting past the committed watermark are leftovers from a failed run.
+    parts = [part for part in parts if int(part.stem.split("-")[1]) <= watermark]
+    if not parts:
+        return pd.DataFrame(
+            columns=[
+                "avaliacaosk", "usuariosk", "filmesk", "nota",
+                "filmenome", "anodelancamento", "duracaomin", "generonome",
+            ]
+        )
+    return pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True)
+
+
+def refresh_training_snapshot(
+    engine: Engine, snapshot_dir: Path
+) -> Tuple[pd.DataFrame, List[str]]:
+    """Bring the local snapshot up to date with the DW and return the training set.
+
+    Only fact rows above the stored ``avaliacaosk``/``receitask`` high-watermarks
+    are fetched. Dimension attributes of already-snapshotted ratings are not
+    refreshed; delete ``snapshot_dir`` to force a full rebuild.
+    """
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _read_manifest(snapshot_dir)
+
+    ratings_watermark = _append_new_ratings(engine, snapshot_dir, manifest["avaliacaosk"])
+    counts, user_state, receita_watermark = _refresh_user_state(
+        engine, snapshot_dir, manifest
+    )
+
+    if receita_watermark != manifest["receitask"]:
+        counts_name = f"state_counts-{receita_watermark}.parquet"
+        user_state_name = f"user_state-{receita_watermark}.parquet"
+        counts.to_parquet(snapshot_dir / counts_name, index=False)
+        user_state.to_parquet(snapshot_dir / user_state_name, index=False)
+        stale = [manifest["state_counts"], manifest["user_state"]]
+        manifest.update(state_counts=counts_name, user_state=user_state_name)
+    else:
+        stale = []
+    manifest.update(avaliacaosk=ratings_watermark, receitask=receita_watermark)
+    _write_manifest(snapshot_dir, manifest)
+    for name in filter(None, stale):
+        (snapshot_dir / name).unlink(missing_ok=True)
+
+    ratings = _read_ratings(snapshot_dir, ratings_watermark)
+    training = ratings.merge(user_state, on="usuariosk", how="inner")
+    return finalize_training_dataset(training)
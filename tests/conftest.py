@@ -0,0 +1,35 @@
+"""Shared fixtures: a throwaway PostgreSQL database per test.
+
+Set ``TEST_DATABASE_URL`` to a SQLAlchemy URL of a server where the user may
+create databases (e.g. ``postgresql+psycopg2://postgres@/postgres?host=/tmp/pg``);
+tests that need PostgreSQL are skipped without it.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from typing import Iterator
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+
+
+@pytest.fixture
+def pg_engine() -> Iterator[Engine]:
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL não definido.")
+    admin = create_engine(url, isolation_level="AUTOCOMMIT")
+    name = f"test_{uuid.uuid4().hex[:12]}"
+    with admin.connect() as conn:
+        conn.exec_driver_sql(f"CREATE DATABASE {name};")
+    engine = create_engine(make_url(url).set(database=name))
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.connect() as conn:
+            conn.exec_driver_sql(f"DROP DATABASE IF EXISTS {name} WITH (FORCE);")
+        admin.dispose()
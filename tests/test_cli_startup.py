@@ -0,0 +1,48 @@
+"""Import-time budget of the ``run_recommender.py`` subcommands.
+
+Each command runs in a fresh interpreter under ``-X importtime``: parsing the
+arguments of any subcommand must stay within the budget and must not import
+the heavy packages only the handlers need.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+CLI = Path(__file__).resolve().parents[1] / "run_recommender.py"
+BUDGET_MS = 100.0
+HEAVY_PACKAGES = {"sklearn", "pandas", "numpy", "scipy", "sqlalchemy", "pyarrow", "dotenv"}
+
+
+def _imports(command: List[str]) -> Tuple[float, List[str]]:
+    """Total import time (ms) of ``command`` and the top-level packages it imported."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", str(CLI), *command],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=CLI.parent,
+    )
+    total_us, packages = 0, set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        packages.add(name.strip().split(".")[0])
+        # Top-level imports are not indented; their cumulative time includes children.
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return total_us / 1000, sorted(packages)
+
+
+@pytest.mark.parametrize("command", ["", "imdb", "train", "infer", "export", "serve"])
+def test_help_stays_light(command):
+    import_ms, packages = _imports([*command.split(), "--help"])
+
+    assert not HEAVY_PACKAGES.intersection(packages)
+    assert import_ms <= BUDGET_MS
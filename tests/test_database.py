@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+from sqlalchemy import inspect
+
+from src.recommender.database import write_table
+
+
+def _frame(n: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Estado": [f"S{i % 3}" for i in range(n)],
+            "FilmeNome": [f'Filme "{i}", parte {i}' for i in range(n)],
+            "PredicaoModelo": [i / 10 for i in range(n)],
+        }
+    )
+
+
+def test_write_table_replace_swaps_mixed_case_table(pg_engine):
+    for n in (5, 7):
+        write_table(
+            pg_engine, _frame(n), schema="Imdb", table_name="ModelInfer", index_columns=("Estado",)
+        )
+
+    stored = pd.read_sql_query('SELECT * FROM "Imdb"."ModelInfer" ORDER BY 3', pg_engine)
+    pd.testing.assert_frame_equal(stored, _frame(7))
+    inspector = inspect(pg_engine)
+    assert inspector.get_table_names(schema="Imdb") == ["ModelInfer"]
+    assert [ix["name"] for ix in inspector.get_indexes("ModelInfer", schema="Imdb")] == [
+        "ModelInfer_estado_idx"
+    ]
+
+
+def test_write_table_appends_with_copy(pg_engine):
+    write_table(pg_engine, _frame(3), schema="imdb_alv", table_name="model_infer")
+    sent = write_table(
+        pg_engine, _frame(4), schema="imdb_alv", table_name="model_infer", if_exists="append"
+    )
+
+    count = pd.read_sql_query("SELECT count(*) AS n FROM imdb_alv.model_infer", pg_engine)
+    assert count["n"].iloc[0] == 7
+    assert sent == len(_frame(4).to_csv(header=False, index=False).encode())
+
+
+def test_write_table_rejects_bad_table_name(pg_engine):
+    with pytest.raises(ValueError, match="Invalid table name"):
+        write_table(pg_engine, _frame(1), schema="imdb_alv", table_name="model-infer")
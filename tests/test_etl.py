@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict
+
+import pytest
+from sqlalchemy import text
+
+from src.recommender.etl import UNKNOWN_PRODUCER, run_incremental_etl
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _user(user_id: int, estado: str) -> Dict:
+    return {
+        "id": user_id,
+        "email": f"u{user_id}@alv.com",
+        "telefone": f"9{user_id:04d}",
+        "estado": estado,
+    }
+
+
+def _add_users(conn, *users: Dict) -> None:
+    conn.execute(
+        text(
+            "INSERT INTO oper_alv.usuario VALUES (:id, :email, :telefone, '2030-01-01', 123, "
+            "'4111', 'Dono', 1, 'Nome', 'Bairro', 'Cidade', :estado, 'Rua')"
+        ),
+        list(users),
+    )
+
+
+def _add_ratings(conn, *ratings) -> None:
+    conn.execute(
+        text(
+            "INSERT INTO oper_alv.avaliacao VALUES (NULL, :data, :nota, :id, :usuario, :filme)"
+        ),
+        [
+            {"id": rid, "usuario": uid, "filme": fid, "nota": nota, "data": data}
+            for rid, uid, fid, nota, data in ratings
+        ],
+    )
+
+
+@pytest.fixture
+def alv_engine(pg_engine):
+    """Operational and DW schemas from the repo's DDL, with a first batch of rows."""
+    with pg_engine.begin() as conn:
+        for script in ("DDL_create_tables_ALV.sql", "DDL_create_dw_ALV.sql"):
+            conn.exec_driver_sql((ROOT / script).read_text(encoding="utf-8"))
+        conn.exec_driver_sql("SET search_path TO public")
+        conn.exec_driver_sql(
+            "INSERT INTO oper_alv.plano VALUES (1, 19.9, 'Básico');"
+            "INSERT INTO oper_alv.assinatura VALUES (1, '2024-01-01', '2025-01-01', 1, 1);"
+            "INSERT INTO oper_alv.filme VALUES (100, 'Filme A', 1, 2001), (90, 'Filme B', 2, 2002);"
+            "INSERT INTO oper_alv.filme_generofilme VALUES ('Drama', 1), ('Ação', 1);"
+        )
+        _add_users(conn, _user(1, "SP"), _user(2, "RJ"))
+        _add_ratings(conn, (1, 1, 1, 5, "2024-03-01"), (2, 2, 2, 3, "2024-03-02"))
+        conn.exec_driver_sql(
+            "INSERT INTO oper_alv.usrpagto VALUES (1, 19.9, '2024-03-01', 1, 1);"
+        )
+    return pg_engine
+
+
+def _dw(engine, sql: str):
+    with engine.connect() as conn:
+        return conn.execute(text(sql)).all()
+
+
+def _facts(engine):
+    return _dw(
+        engine,
+        "SELECT a.avaliacaosk, a.nota, u.email, f.filmenome, p.produtoranome, c.datacompleta, "
+        "e.estado FROM dw_alv.avaliacao a "
+        "JOIN dw_alv.usuario u USING (usuariosk) JOIN dw_alv.filme f USING (filmesk) "
+        "JOIN dw_alv.produtora p USING (produtorask) "
+        "JOIN dw_alv.calendario c USING (calendariosk) "
+        "JOIN dw_alv.endereco e USING (enderecosk) ORDER BY 1",
+    )
+
+
+def test_first_load_without_producers_uses_unknown_producer(alv_engine):
+    stats = {s.step: s.rows for s in run_incremental_etl(alv_engine, max_workers=2)}
+
+    assert stats["avaliacao"] == 2 and stats["receita"] == 1
+    facts = _facts(alv_engine)
+    assert [(f.email, f.filmenome, f.produtoranome, f.estado) for f in facts] == [
+        ("u1@alv.com", "Filme A", UNKNOWN_PRODUCER, "SP"),
+        ("u2@alv.com", "Filme B", UNKNOWN_PRODUCER, "RJ"),
+    ]
+    assert _dw(alv_engine, "SELECT generonome FROM dw_alv.filme ORDER BY filmesk") == [
+        ("Ação",),
+        ("Gênero Desconhecido",),
+    ]
+
+
+def test_incremental_load_and_rerun(alv_engine):
+    run_incremental_etl(alv_engine, max_workers=2)
+    with alv_engine.begin() as conn:
+        _add_users(conn, _user(3, "SP"))
+        conn.exec_driver_sql(
+            "INSERT INTO oper_alv.filme VALUES (80, 'Filme C', 3, 2003);"
+            "INSERT INTO oper_alv.produtora VALUES (1, 'Estúdio');"
+            "INSERT INTO oper_alv.filmpagtoroy VALUES (10.0, '2024-04-01', 1, 3);"
+            "INSERT INTO oper_alv.usrpagto VALUES (2, 19.9, '2024-04-02', 3, 1);"
+        )
+        _add_ratings(conn, (3, 3, 3, 4, "2024-04-02"), (4, 1, 2, 2, "2024-04-03"))
+
+    stats = {s.step: s.rows for s in run_incremental_etl(alv_engine, max_workers=2)}
+
+    assert stats["avaliacao"] == 2 and stats["receita"] == 1 and stats["usuario"] == 1
+    facts = _facts(alv_engine)
+    assert [(f.avaliacaosk, f.email, f.produtoranome, f.estado) for f in facts] == [
+        (1, "u1@alv.com", UNKNOWN_PRODUCER, "SP"),
+        (2, "u2@alv.com", UNKNOWN_PRODUCER, "RJ"),
+        (3, "u3@alv.com", "Estúdio", "SP"),
+        (4, "u1@alv.com", UNKNOWN_PRODUCER, "SP"),
+    ]
+    assert _dw(alv_engine, "SELECT count(*) FROM dw_alv.endereco") == [(2,)]
+
+    rerun = {s.step: s.rows for s in run_incremental_etl(alv_engine, max_workers=2)}
+    assert rerun["avaliacao"] == 0 and rerun["receita"] == 0
+    full = {s.step: s.rows for s in run_incremental_etl(alv_engine, full=True, max_workers=2)}
+    assert full["avaliacao"] == 4 and full["receita"] == 2
+    assert _facts(alv_engine) == facts
+
+
+def test_unmatched_facts_keep_the_watermark(alv_engine):
+    run_incremental_etl(alv_engine, max_workers=2)
+    with alv_engine.begin() as conn:
+        # A user the DW lost: their id is behind the watermark, so no step re-adds them.
+        conn.exec_driver_sql("DELETE FROM dw_alv.receita WHERE usuariosk = 1")
+        conn.exec_driver_sql(
+            "DELETE FROM dw_alv.avaliacao WHERE usuariosk = 1;"
+            "DELETE FROM dw_alv.usuario WHERE email = 'u1@alv.com';"
+        )
+        _add_ratings(conn, (3, 1, 1, 4, "2024-04-01"), (4, 2, 1, 4, "2024-04-01"))
+
+    with pytest.raises(RuntimeError, match="1 de 2 linhas sem correspondência"):
+        run_incremental_etl(alv_engine, max_workers=2)
+
+    assert _dw(alv_engine, "SELECT valor FROM dw_alv.etl_watermark WHERE fonte = 'avaliacao'") == [
+        (2,)
+    ]
+    assert _dw(alv_engine, "SELECT max(avaliacaosk) FROM dw_alv.avaliacao") == [(2,)]
+
+
+def test_rating_without_dw_state_keeps_the_watermark(alv_engine):
+    run_incremental_etl(alv_engine, max_workers=2)
+    with alv_engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM dw_alv.endereco WHERE estado = 'RJ'")
+        _add_ratings(conn, (3, 2, 1, 4, "2024-04-01"))
+
+    with pytest.raises(RuntimeError, match="1 de 1 linhas sem correspondência"):
+        run_incremental_etl(alv_engine, max_workers=2)
+
+    assert _dw(alv_engine, "SELECT valor FROM dw_alv.etl_watermark WHERE fonte = 'avaliacao'") == [
+        (2,)
+    ]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import logging
+
+import pandas as pd
+import pytest
+from openpyxl.worksheet._writer import ALL_TEMP_FILES
+
+from src.recommender import export
+from src.recommender.export import export_tables
+
+
+def test_parquet_export_keeps_column_types_null_in_first_chunk(pg_engine, tmp_path):
+    with pg_engine.begin() as conn:
+        conn.exec_driver_sql("CREATE SCHEMA dw_alv;")
+        conn.exec_driver_sql(
+            "CREATE TABLE dw_alv.filme (filmesk INT, filmenome VARCHAR(50), "
+            "duracaomin INT, lancamento DATE);"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO dw_alv.filme VALUES (1, NULL, NULL, NULL), (2, NULL, NULL, NULL), "
+            "(3, 'Filme', 90, '2020-01-01'), (4, 'Outro', NULL, NULL);"
+        )
+
+    stats = export_tables(
+        pg_engine, tmp_path, fmt="parquet", tables=["Filme"], max_workers=1, chunksize=2
+    )
+
+    exported = pd.read_parquet(tmp_path / "filme.parquet")
+    assert stats[0].rows == 4
+    assert exported["filmenome"].tolist()[2:] == ["Filme", "Outro"]
+    assert exported["duracaomin"].tolist()[2] == 90
+    assert str(exported["lancamento"].iloc[2]) == "2020-01-01"
+
+
+@pytest.mark.parametrize("fmt", ["xlsx", "parquet", "csv"])
+def test_failed_reader_removes_partial_output(fmt, tmp_path, monkeypatch, caplog):
+    def iter_table(engine, table, chunksize, compact):
+        yield pd.DataFrame({"id": [1, 2], "nome": ["a", "b"]})
+        if table == "dw_alv.Receita":
+            raise RuntimeError("conexão perdida")
+        yield pd.DataFrame({"id": [3], "nome": ["c"]})
+
+    monkeypatch.setattr(export, "iter_table", iter_table)
+    monkeypatch.setattr(export, "_column_types", lambda engine, schema, tables: {})
+    output = tmp_path / ("dw.xlsx" if fmt == "xlsx" else "dw")
+    temp_files = len(ALL_TEMP_FILES)
+
+    with caplog.at_level(logging.INFO, logger=export.__name__):
+        with pytest.raises(RuntimeError, match="conexão perdida"):
+            export_tables(None, output, fmt=fmt, tables=["Filme", "Receita"], max_workers=2)
+
+    assert not output.exists() or not any(output.iterdir())
+    assert len(ALL_TEMP_FILES) == temp_files
+    assert not any(record.getMessage().startswith("Receita:") for record in caplog.records)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import gzip
+from pathlib import Path
+from typing import Dict, List
+
+import pyarrow.parquet as pq
+import pytest
+
+from benchmarks.synthetic import write_imdb_dumps
+from src.recommender.datasets import prepare_candidate_movies
+from src.recommender.imdb import (
+    BASICS_FILE,
+    MIN_AVERAGE_RATING,
+    MIN_NUM_VOTES,
+    RATINGS_FILE,
+    build_imdb_movies,
+    read_movies,
+)
+
+
+def _dump_rows(path: Path) -> List[Dict[str, str]]:
+    """Rows of a synthetic dump as strings, skipping lines with the wrong field count."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header, *lines = f.read().splitlines()
+    names = header.split("\t")
+    fields = [line.split("\t") for line in lines]
+    return [dict(zip(names, values)) for values in fields if len(values) == len(names)]
+
+
+@pytest.fixture(scope="module")
+def dumps(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("imdb")
+    write_imdb_dumps(3000, directory)
+    return directory
+
+
+@pytest.fixture(scope="module")
+def basics(dumps):
+    return {row["tconst"]: row for row in _dump_rows(dumps / BASICS_FILE)}
+
+
+@pytest.fixture(scope="module")
+def movies_path(dumps):
+    path = dumps / "imdb_movies.parquet"
+    build_imdb_movies(dumps, path)
+    return path
+
+
+def test_keeps_rated_movies_above_thresholds_in_order(dumps, basics, movies_path):
+    expected = [
+        (-float(row["averageRating"]), -int(row["numVotes"]), row["tconst"])
+        for row in _dump_rows(dumps / RATINGS_FILE)
+        if basics[row["tconst"]]["titleType"] == "movie"
+        and float(row["averageRating"]) >= MIN_AVERAGE_RATING
+        and int(row["numVotes"]) >= MIN_NUM_VOTES
+    ]
+    built = pq.read_table(movies_path).to_pylist()
+
+    assert expected and [row["tconst"] for row in built] == [key for *_, key in sorted(expected)]
+
+
+def test_null_markers_and_stray_runtimes_read_as_null(dumps, basics, movies_path):
+    built = {row["tconst"]: row for row in pq.read_table(movies_path).to_pylist()}
+    null_genres = [key for key, row in basics.items() if row["genres"] == "\\N"]
+    stray_runtimes = [key for key, row in basics.items() if row["runtimeMinutes"] == "Reality-TV"]
+
+    assert any(key in built for key in null_genres)
+    for key, row in built.items():
+        assert (row["genres"] is None) == (key in null_genres)
+
+    movies = {row["tconst"]: row for row in read_movies(dumps / BASICS_FILE).to_pylist()}
+    assert any(key in movies for key in stray_runtimes)
+    for key in stray_runtimes:
+        assert key not in movies or movies[key]["runtimeminutes"] is None
+
+
+def test_line_with_too_many_fields_is_skipped(dumps, basics):
+    movies = read_movies(dumps / BASICS_FILE)
+
+    assert "tt99999999" not in basics
+    assert "tt99999999" not in movies["tconst"].to_pylist()
+    assert movies.num_rows == sum(row["titleType"] == "movie" for row in basics.values())
+
+
+def test_candidate_reader_reads_the_output(movies_path):
+    eligible = [
+        row["tconst"]
+        for row in pq.read_table(movies_path).to_pylist()
+        if (row["runtimeminutes"] or 0) > 0
+        and (row["startyear"] or 0) > 1900
+        and row["numvotes"] >= 1000
+    ]
+    candidates = prepare_candidate_movies(movies_path, limit=10)
+
+    assert candidates["filmeimdbskraw"].tolist() == eligible[:10]
+    assert candidates["generonome"].notna().all()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from src.recommender.outputs import read_predictions, write_predictions
+
+
+@pytest.fixture
+def predictions_path(tmp_path):
+    path = tmp_path / "predictions.parquet"
+    frame = pd.DataFrame(
+        {
+            "FilmeNome": ["A", "B", "C", "D"],
+            "Estado": ["SP", "RJ", "SP", "MG"],
+            "PredicaoModelo": [4.0, 3.0, 4.5, 2.0],
+        }
+    )
+    write_predictions(frame, path)
+    return path
+
+
+def test_read_predictions_filters_states(predictions_path):
+    read = read_predictions(predictions_path, ["SP", "MG"], columns=["FilmeNome"])
+    assert read["FilmeNome"].tolist() == ["D", "C", "A"]
+
+
+def test_read_predictions_with_no_states_is_empty(predictions_path):
+    read = read_predictions(predictions_path, [])
+    assert read.empty
+    assert list(read.columns) == ["FilmeNome", "Estado", "PredicaoModelo"]
+
+
+def test_one_state_read_touches_one_row_group(tmp_path, monkeypatch):
+    # The shape of today's output: 50 states with 25 movies each.
+    states = [f"Estado {i:02d}" for i in range(50)]
+    frame = pd.DataFrame(
+        {
+            "FilmeNome": [f"Filme {i}" for i in range(25)] * len(states),
+            "Estado": [state for state in states for _ in range(25)],
+            "PredicaoModelo": [i / 10 for i in range(25)] * len(states),
+        }
+    )
+    path = tmp_path / "predictions.parquet"
+    write_predictions(frame, path)
+
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.num_row_groups == len(states)
+    column = metadata.schema.names.index("Estado")
+    stats = [metadata.row_group(i).column(column).statistics for i in range(len(states))]
+    assert all(s.min == s.max for s in stats)
+
+    read_groups = []
+    read_row_groups = pq.ParquetFile.read_row_groups
+
+    def spy(self, row_groups, **kwargs):
+        read_groups.extend(row_groups)
+        return read_row_groups(self, row_groups, **kwargs)
+
+    monkeypatch.setattr(pq.ParquetFile, "read_row_groups", spy)
+    read = read_predictions(path, ["Estado 07"])
+
+    assert read_groups == [7]
+    assert len(read) == 25 and set(read["Estado"]) == {"Estado 07"}
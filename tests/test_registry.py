@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from src.recommender.registry import latest_fingerprint, load_or_train_model
+
+
+def _training(seed: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "anodelancamento": [2000.0 + seed, 2010.0, 1995.0, 2020.0],
+            "duracaomin": [90.0, 120.0, 100.0, 80.0],
+            "generonome": ["Drama", "Ação", "Drama", "Comédia"],
+            "generos": ["Drama", "Ação,Drama", "Drama", "Comédia"],
+            "estado": ["SP", "RJ", "SP", "MG"],
+            "nota": [4.0, 3.0, 5.0, 2.0],
+        }
+    )
+
+
+def test_registry_keeps_recent_artifacts_and_latest(tmp_path):
+    fingerprints = []
+    for seed in range(4):
+        load_or_train_model(_training(seed), tmp_path, engine="linear", keep=2)
+        fingerprints.append(latest_fingerprint(tmp_path))
+    # Reusing the oldest surviving model makes it the most recent one.
+    load_or_train_model(_training(2), tmp_path, engine="linear", keep=2)
+    load_or_train_model(_training(4), tmp_path, engine="linear", keep=2)
+    fingerprints.append(latest_fingerprint(tmp_path))
+
+    stored = {path.stem for path in tmp_path.glob("*.joblib")}
+    assert stored == {fingerprints[2], fingerprints[4]}
+    assert latest_fingerprint(tmp_path) == fingerprints[4]
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pytest
+
+from run_recommender import build_parser
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--no-cache", "--workers", "3", "--compact-dtypes", "infer"],
+        ["infer", "--no-cache", "--workers", "3", "--compact-dtypes"],
+        ["--no-cache", "infer", "--workers", "3", "--compact-dtypes"],
+    ],
+)
+def test_run_options_apply_before_or_after_the_subcommand(argv):
+    args = build_parser().parse_args(argv)
+
+    assert (args.use_cache, args.workers, args.compact_dtypes) == (False, 3, True)
+
+
+def test_subcommand_keeps_run_option_defaults():
+    args = build_parser().parse_args(["train"])
+
+    assert (args.use_cache, args.compact_dtypes, args.profile_stage) == (True, False, [])